@@ -0,0 +1,172 @@
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pulp
+from data.transaction_data_generator import generate_transaction_data
+from preparation.data_preparer import prepare_data
+from model.model_creator import create_model
+from model.solution_parser import parse_solution
+from visualization.data_visualizer import aggregate_transactions
+from visualization.solution_data_visualizer import build_solution_cube
+
+# the sizes of benchmarks/baseline.json, a million rows takes too long to
+# solve for a regular run and is opt-in
+SIZES = [1000, 10000, 100000]
+LARGE_SIZE = 1000000
+IMPORTANCE_FACTORS = {
+    "grocery": 1,
+    "fashion": 2,
+    "shopping": 3,
+    "travel": 10,
+    "rent": 1000,
+    "unknown": 10,
+    "income": 0,
+}
+SAVINGS = 0.3
+GROCERY_PER_WEEK = 50.0
+# stages faster than this are too noisy to flag
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def generate_stage(state: Dict[str, Any]):
+    state["data"] = generate_transaction_data(state["size"])
+
+
+def prepare_stage(state: Dict[str, Any]):
+    prepare_data(state["data"])
+    state["data"]["importance"] = state["data"]["type"].map(IMPORTANCE_FACTORS)
+
+
+def create_model_stage(state: Dict[str, Any]):
+    state["model"], state["decision_vars"] = create_model(
+        state["data"], SAVINGS, GROCERY_PER_WEEK
+    )
+
+
+def solve_stage(state: Dict[str, Any]):
+    state["model"].solve(pulp.PULP_CBC_CMD(msg=False))
+
+
+def parse_solution_stage(state: Dict[str, Any]):
+    state["data"]["solution"], _ = parse_solution(
+        state["data"], state["decision_vars"], state["model"]
+    )
+
+
+def data_aggregation_stage(state: Dict[str, Any]):
+    aggregate_transactions(state["data"])
+
+
+def solution_aggregation_stage(state: Dict[str, Any]):
+    build_solution_cube(state["data"])
+
+
+STAGES: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "generate": generate_stage,
+    "prepare": prepare_stage,
+    "create_model": create_model_stage,
+    "solve": solve_stage,
+    "parse_solution": parse_solution_stage,
+    "data_aggregation": data_aggregation_stage,
+    "solution_aggregation": solution_aggregation_stage,
+}
+
+
+def run_benchmarks(sizes: List[int] = SIZES, repeat: int = 1) -> pd.DataFrame:
+    # stages depend on the previous ones, so every repetition runs the whole
+    # pipeline and the fastest time of each stage is kept. Tracing memory
+    # slows down allocations, so peak memory comes from one extra traced run;
+    # it is what python and numpy allocate, the CBC process is not included
+    rows = []
+    for size in sizes:
+        for traced in [False] * repeat + [True]:
+            state = {"size": size}
+            for stage, run in STAGES.items():
+                if traced:
+                    tracemalloc.start()
+                start = time.perf_counter()
+                run(state)
+                seconds = time.perf_counter() - start
+                if traced:
+                    peak = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+                    rows.append((size, stage, np.nan, peak))
+                else:
+                    rows.append((size, stage, seconds, np.nan))
+    results = pd.DataFrame(rows, columns=["size", "stage", "seconds", "peak_mb"])
+    return (
+        results.groupby(["size", "stage"], sort=False)
+        .agg({"seconds": "min", "peak_mb": "max"})
+        .reset_index()
+    )
+
+
+def save_results(results: pd.DataFrame, path: str):
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "results": results.to_dict(orient="records"),
+            },
+            f,
+            indent=2,
+        )
+
+
+def load_results(path: str) -> pd.DataFrame:
+    with open(path) as f:
+        return pd.DataFrame(json.load(f)["results"])
+
+
+def find_regressions(
+    results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float = 0.2
+) -> pd.DataFrame:
+    compared = results.merge(baseline, on=["size", "stage"], suffixes=("", "_baseline"))
+    slower = (compared["seconds"] > compared["seconds_baseline"] * (1 + tolerance)) & (
+        compared["seconds"] - compared["seconds_baseline"] > MIN_REGRESSION_SECONDS
+    )
+    larger = compared["peak_mb"] > compared["peak_mb_baseline"] * (1 + tolerance)
+    return compared[slower | larger]
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time and peak memory of each pipeline stage"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument(
+        "--large", action="store_true", help=f"also run {LARGE_SIZE} rows"
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="write results as json")
+    parser.add_argument("--baseline", help="json results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(arguments)
+
+    sizes = args.sizes + [LARGE_SIZE] if args.large else args.sizes
+    results = run_benchmarks(sizes, args.repeat)
+    print(results.to_string(index=False))
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        regressions = find_regressions(
+            results, load_results(args.baseline), args.tolerance
+        )
+        if len(regressions):
+            print("\nRegressions against the baseline:")
+            print(regressions.to_string(index=False))
+            return 1
+        print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
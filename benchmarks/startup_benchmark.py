@@ -0,0 +1,84 @@
+from typing import List, Optional, Set, Tuple
+import argparse
+import re
+import subprocess
+import sys
+import time
+
+# what a headless batch job imports, the visualizers only for aggregations
+HEADLESS_MODULES = [
+    "data.transaction_data_generator",
+    "preparation.data_preparer",
+    "model.model_creator",
+    "model.model_solver",
+    "model.solution_parser",
+    "model.batch_runner",
+    "visualization.data_visualizer",
+    "visualization.solution_data_visualizer",
+]
+# only loaded on first use, the headless path must not execute them
+DEFERRED_MODULES = [
+    "plotly.express",
+    "plotly.subplots",
+    "plotly.graph_objects",
+    "scipy",
+    "ipywidgets",
+]
+STARTUP_BUDGET_SECONDS = 1.0
+
+
+def measure_startup(
+    modules: List[str] = HEADLESS_MODULES, repeat: int = 5
+) -> Tuple[float, Set[str]]:
+    # a fresh interpreter per run, the fastest one is kept. -X importtime
+    # lists the modules that were executed, lazy ones are left out until
+    # their first attribute access
+    command = [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"]
+    seconds, executed = float("inf"), set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            raise Exception(f"Importing {modules} failed:\n{completed.stderr}")
+        seconds = min(seconds, elapsed)
+        executed = set(
+            re.findall(r"^import time:.*\|\s*([\w.]+)$", completed.stderr, re.MULTILINE)
+        )
+    return seconds, executed
+
+
+def deferred_imports(
+    executed: Set[str], deferred: List[str] = DEFERRED_MODULES
+) -> List[str]:
+    return [
+        d
+        for d in deferred
+        if any(module == d or module.startswith(d + ".") for module in executed)
+    ]
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Interpreter startup and import time of the headless pipeline"
+    )
+    parser.add_argument("--modules", nargs="+", default=HEADLESS_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS)
+    args = parser.parse_args(arguments)
+
+    seconds, executed = measure_startup(args.modules, args.repeat)
+    eager = deferred_imports(executed)
+    print(f"Startup time: {seconds:.3f} s, budget {args.budget:.3f} s")
+    failed = False
+    if seconds > args.budget:
+        print("Startup time is over the budget")
+        failed = True
+    if eager:
+        print(f"Modules that should be deferred were imported: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
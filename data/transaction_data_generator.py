@@ -1,6 +1,26 @@
 import pandas as pd
 import numpy as np
 import datetime
+import os
+from typing import List, Union
+
+INFO_RECS = [
+    "Lidl 124 DE",
+    "Rewe SAGT DANKE",
+    "Edeka 1452 BERLIN//BERLIN/DE 02-11-2020T1",
+    "ALDI SAGT DANKE 128 041//Berlin/DE",
+    "ROSSMANN 124",
+    "Zalando Payments GmbH;SUPP Lieferantenzahlg",
+    "AMAZON PAYMENTS EUROPE S.C.A.",
+    "Decathlon 142 Berlin",
+    "Mediamarkt DE 124",
+    "Easyjet DE 123",
+    "Lufthansa DE 513",
+    "Booking.com hotel",
+]
+MULTIPLIERS_RECS = [1, 1, 1, 1, 1, 2, 2, 3, 4, 10, 15, 25]
+REC_PROBABILITIES = np.array([7, 5, 10, 5, 3, 3, 3, 1, 0.5, 0.1, 0.1, 0.1])
+REC_PROBABILITIES = REC_PROBABILITIES / sum(REC_PROBABILITIES)
 
 
 def generate_transaction_data(
@@ -10,30 +30,12 @@ def generate_transaction_data(
     seed=1245,
 ) -> pd.DataFrame:
     np.random.seed(seed=seed)
-    info_recs = [
-        "Lidl 124 DE",
-        "Rewe SAGT DANKE",
-        "Edeka 1452 BERLIN//BERLIN/DE 02-11-2020T1",
-        "ALDI SAGT DANKE 128 041//Berlin/DE",
-        "ROSSMANN 124",
-        "Zalando Payments GmbH;SUPP Lieferantenzahlg",
-        "AMAZON PAYMENTS EUROPE S.C.A.",
-        "Decathlon 142 Berlin",
-        "Mediamarkt DE 124",
-        "Easyjet DE 123",
-        "Lufthansa DE 513",
-        "Booking.com hotel",
-    ]
-    multipliers_recs = [1, 1, 1, 1, 1, 2, 2, 3, 4, 10, 15, 25]
-    rec_probabilities = np.array([7, 5, 10, 5, 3, 3, 3, 1, 0.5, 0.1, 0.1, 0.1])
-    rec_probabilities = rec_probabilities / sum(rec_probabilities)
-
-    choices = np.random.choice(len(info_recs), data_size, p=rec_probabilities)
+    choices = np.random.choice(len(INFO_RECS), data_size, p=REC_PROBABILITIES)
     data = pd.DataFrame(
         {
-            "Beneficiary / Originator": np.take(info_recs, choices),
-            "Payment Details": np.take(info_recs, choices),
-            "Debit": -1 * np.take(multipliers_recs, choices),
+            "Beneficiary / Originator": np.take(INFO_RECS, choices),
+            "Payment Details": np.take(INFO_RECS, choices),
+            "Debit": -1 * np.take(MULTIPLIERS_RECS, choices),
         }
     )
 
@@ -91,3 +93,101 @@ def generate_random_date(start_date, end_date, size):
     days_to_date_string = np.vectorize(days_to_date_string)
 
     return days_to_date_string(random_number_of_days)
+
+
+def generate_accounts_data(
+    accounts: int = 100,
+    data_size: int = 400,
+    start_date=datetime.date(2019, 1, 1),
+    end_date=datetime.date(2020, 1, 1),
+    seed: Union[int, np.random.SeedSequence] = 1245,
+    first_account: int = 0,
+    rent_amount: float = 1300.0,
+    salary_amount: float = 3000.0,
+) -> pd.DataFrame:
+    # same distribution as generate_transaction_data for many accounts at
+    # once, with a local generator and datetime64 dates
+    rng = np.random.default_rng(seed)
+    size = accounts * data_size
+    choices = rng.choice(len(INFO_RECS), size, p=REC_PROBABILITIES)
+    debit = np.round(-np.take(MULTIPLIERS_RECS, choices) * rng.random(size) * 60, 2)
+    days = rng.integers((end_date - start_date).days, size=size)
+    dates = np.datetime64(start_date, "ns") + days.astype("timedelta64[D]")
+
+    month_starts = pd.date_range(start_date, end_date, freq="MS").to_numpy()
+    monthly = accounts * len(month_starts)
+    account_ids = np.arange(first_account, first_account + accounts)
+    no_amount = np.full(monthly, np.nan)
+
+    monthly_account = np.repeat(account_ids, len(month_starts))
+    account = np.concatenate(
+        [np.repeat(account_ids, data_size), monthly_account, monthly_account]
+    )
+    originator = np.concatenate(
+        [choices, np.full(monthly, len(INFO_RECS)), np.full(monthly, -1)]
+    )
+    details = np.concatenate(
+        [
+            choices,
+            np.full(monthly, len(INFO_RECS)),
+            np.full(monthly, len(INFO_RECS) + 1),
+        ]
+    )
+    order = np.lexsort((rng.random(len(account)), account))
+    return pd.DataFrame(
+        {
+            "account": account[order],
+            "Beneficiary / Originator": pd.Categorical.from_codes(
+                originator[order], INFO_RECS + ["Landlord"]
+            ),
+            "Payment Details": pd.Categorical.from_codes(
+                details[order], INFO_RECS + ["Rent", "Salary"]
+            ),
+            "Debit": np.concatenate([debit, np.full(monthly, -rent_amount), no_amount])[
+                order
+            ],
+            "Booking date": np.concatenate(
+                [
+                    dates,
+                    np.tile(month_starts, accounts),
+                    np.tile(month_starts, accounts),
+                ]
+            )[order],
+            "Credit": np.concatenate(
+                [np.full(size, np.nan), no_amount, np.full(monthly, salary_amount)]
+            )[order],
+            "Currency": pd.Categorical.from_codes(
+                np.zeros(len(account), dtype=np.int8), ["EUR"]
+            ),
+        }
+    )
+
+
+def write_accounts_data(
+    directory: str,
+    accounts: int,
+    data_size: int = 400,
+    accounts_per_chunk: int = 1000,
+    start_date=datetime.date(2019, 1, 1),
+    end_date=datetime.date(2020, 1, 1),
+    seed: int = 1245,
+) -> List[str]:
+    # each chunk gets its own child seed, so the files only depend on the
+    # seed and the chunking and can be regenerated one by one
+    os.makedirs(directory, exist_ok=True)
+    starts = range(0, accounts, accounts_per_chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    paths = []
+    for chunk, (first_account, chunk_seed) in enumerate(zip(starts, seeds)):
+        data = generate_accounts_data(
+            min(accounts_per_chunk, accounts - first_account),
+            data_size,
+            start_date,
+            end_date,
+            chunk_seed,
+            first_account,
+        )
+        path = os.path.join(directory, f"part-{chunk:05d}.csv")
+        data.to_csv(path, index=False)
+        paths.append(path)
+    return paths
@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional
+import json
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+CBC_STATISTICS = {
+    "result": (r"^Result - (.+)$", str),
+    "objective": (r"^Objective value:\s+(\S+)", float),
+    # CBC prints the lower bound of minimizations and the upper bound of
+    # maximizations
+    "bound": (r"^(?:Lower|Upper) bound:\s+(\S+)", float),
+    "gap": (r"^Gap:\s+(\S+)", float),
+    "nodes": (r"^Enumerated nodes:\s+(\d+)", int),
+    "iterations": (r"^Total iterations:\s+(\d+)", int),
+    "cpu_seconds": (r"^Time \(CPU seconds\):\s+(\S+)", float),
+    "wall_seconds": (r"^Time \(Wallclock seconds\):\s+(\S+)", float),
+}
+
+_active: ContextVar[Optional["Recorder"]] = ContextVar("recorder", default=None)
+
+
+class Recorder:
+    def __init__(self, name: str = "budget_optimization"):
+        self.name = name
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, float] = {}
+        self.solver: Dict[str, Any] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # repeated stages add up, e.g. one solve per slider change
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - start
+            )
+
+    def set_counter(self, name: str, value: float):
+        self.counters[name] = value
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "timings": dict(self.timings),
+            "counters": dict(self.counters),
+            "solver": dict(self.solver),
+        }
+
+    def log(self, level: int = logging.INFO):
+        record = self.record()
+        logger.log(level, json.dumps(record), extra={"instrumentation": record})
+
+
+@contextmanager
+def instrument(name: str = "budget_optimization") -> Iterator[Recorder]:
+    recorder = Recorder(name)
+    token = _active.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _active.reset(token)
+
+
+def active_recorder() -> Optional[Recorder]:
+    return _active.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    # a no-op unless called inside instrument()
+    recorder = _active.get()
+    if recorder is None:
+        yield
+    else:
+        with recorder.stage(name):
+            yield
+
+
+def timed(name: str) -> Callable:
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def set_counter(name: str, value: float):
+    recorder = _active.get()
+    if recorder is not None:
+        recorder.set_counter(name, value)
+
+
+def parse_cbc_log(text: str) -> Dict[str, Any]:
+    statistics = {}
+    for name, (pattern, convert) in CBC_STATISTICS.items():
+        match = re.search(pattern, text, re.MULTILINE)
+        if match:
+            statistics[name] = convert(match.group(1).strip())
+    return statistics
@@ -0,0 +1,231 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Optional, Tuple, Union
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+import numpy as np
+import pandas as pd
+from model.model_creator import create_model
+from model.model_solver import (
+    FEASIBLE_SOLUTIONS,
+    GAP_EPSILON,
+    solution_status,
+    solve_model,
+)
+from model.solution_parser import parse_solution
+
+logger = logging.getLogger(__name__)
+
+# time allowed on top of the solver time limit for building and parsing
+TIMEOUT_GRACE = 30.0
+
+
+class BatchResult(NamedTuple):
+    summary: pd.DataFrame
+    solutions: pd.Series
+
+
+class WorkerPool(NamedTuple):
+    executor: ProcessPoolExecutor
+    # workers put their pid here when they start, so a hung solve can be
+    # stopped without the executor's private process table
+    pids: Any
+
+
+def optimize_accounts(
+    ledgers: Union[pd.DataFrame, Mapping[Any, pd.DataFrame]],
+    savings: float,
+    grocery_per_week: float,
+    account_column: str = "account",
+    processes: Optional[int] = None,
+    timeout: float = 60.0,
+    presolve: bool = False,
+    aggregate: bool = False,
+    gap: Optional[float] = None,
+) -> BatchResult:
+    if isinstance(ledgers, pd.DataFrame):
+        jobs = iter(ledgers.groupby(account_column, sort=False))
+    else:
+        jobs = iter(ledgers.items())
+    processes = processes or os.cpu_count() or 1
+
+    rows, solutions = {}, {}
+    running: Dict[Future, Tuple[Any, float]] = {}
+    # jobs past their deadline keep their worker busy until the solver time
+    # limit stops them, so they still count against the concurrency bound
+    abandoned = set()
+    pool = start_pool(processes)
+    try:
+        while True:
+            abandoned = {f for f in abandoned if not f.done()}
+            if len(abandoned) >= processes:
+                # every worker is held by a job that timed out, the pool is
+                # replaced rather than waiting for them
+                terminate_pool(pool, abandoned)
+                pool = start_pool(processes)
+                abandoned = set()
+            while len(running) + len(abandoned) < processes:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                account, data = job
+                rows[account] = None
+                future = pool.executor.submit(
+                    optimize_account,
+                    data,
+                    savings,
+                    grocery_per_week,
+                    timeout,
+                    presolve,
+                    aggregate,
+                    gap,
+                )
+                running[future] = (account, time.monotonic() + timeout + TIMEOUT_GRACE)
+            # the results are returned without waiting for abandoned jobs,
+            # their workers are terminated below
+            if not running:
+                break
+
+            next_deadline = min(deadline for _, deadline in running.values())
+            done, _ = wait(
+                set(running) | abandoned,
+                timeout=max(next_deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED,
+            )
+
+            broken = False
+            finished = done & set(running)
+            while finished:
+                for future in finished:
+                    account, _ = running.pop(future)
+                    try:
+                        status, objective, bound, solution, seconds = future.result()
+                        error = None
+                    except Exception as e:
+                        # a worker that dies breaks the pool, every job still in
+                        # it fails with the account that killed it
+                        if isinstance(e, BrokenProcessPool):
+                            broken = True
+                        logger.warning(f"Optimization of account {account} failed: {e}")
+                        status, objective, bound, solution, seconds = (
+                            "Error",
+                            np.nan,
+                            np.nan,
+                            None,
+                            np.nan,
+                        )
+                        error = str(e)
+                    if solution is not None:
+                        solutions[account] = solution
+                    rows[account] = (account, status, objective, bound, seconds, error)
+                # the other jobs of a broken pool fail too, they are all
+                # recorded before the pool is replaced
+                finished = set(wait(set(running))[0]) if broken and running else set()
+            if broken:
+                terminate_pool(pool, abandoned)
+                pool = start_pool(processes)
+                abandoned = set()
+                continue
+
+            now = time.monotonic()
+            for future, (account, deadline) in list(running.items()):
+                if deadline <= now:
+                    logger.warning(f"Optimization of account {account} timed out")
+                    running.pop(future)
+                    abandoned.add(future)
+                    rows[account] = (
+                        account,
+                        "Timed out",
+                        np.nan,
+                        np.nan,
+                        np.nan,
+                        None,
+                    )
+    finally:
+        terminate_pool(pool, set(running) | abandoned)
+
+    summary = pd.DataFrame(
+        list(rows.values()),
+        columns=["account", "status", "objective", "bound", "seconds", "error"],
+    )
+    summary.insert(
+        4,
+        "gap",
+        (summary["bound"] - summary["objective"]).abs()
+        / summary["objective"].abs().clip(lower=GAP_EPSILON),
+    )
+    return BatchResult(
+        summary,
+        (
+            pd.concat(solutions, names=["account", None])
+            if solutions
+            else pd.Series([], name="solution", dtype=np.int64)
+        ),
+    )
+
+
+def start_pool(processes: int) -> WorkerPool:
+    pids = multiprocessing.Queue()
+    return WorkerPool(
+        ProcessPoolExecutor(
+            max_workers=processes, initializer=report_pid, initargs=(pids,)
+        ),
+        pids,
+    )
+
+
+def report_pid(pids):
+    pids.put(os.getpid())
+
+
+def terminate_pool(pool: WorkerPool, futures: Iterable[Future]):
+    # shutdown leaves running jobs to finish, the workers are stopped
+    # directly so a hung solve does not outlive the batch. Jobs not started
+    # yet are cancelled first so that no worker picks them up
+    for future in futures:
+        future.cancel()
+    pool.executor.shutdown(wait=False)
+    while True:
+        try:
+            pid = pool.pids.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            # the worker has already exited
+            pass
+    pool.pids.close()
+
+
+def optimize_account(
+    data: pd.DataFrame,
+    savings: float,
+    grocery_per_week: float,
+    time_limit: float,
+    presolve: bool = False,
+    aggregate: bool = False,
+    gap: Optional[float] = None,
+) -> Tuple[str, float, float, Optional[pd.Series], float]:
+    start = time.perf_counter()
+    model, decision_vars = create_model(
+        data, savings, grocery_per_week, presolve=presolve, aggregate=aggregate
+    )
+    solve_model(model, time_limit=time_limit, gap=gap, statistics=True)
+    if model.sol_status in FEASIBLE_SOLUTIONS:
+        # a plan found before the time limit is kept with its bound
+        solution, objective = parse_solution(data, decision_vars, model)
+        bound = model.solver_statistics["bound"]
+    else:
+        solution, objective, bound = None, np.nan, np.nan
+    return (
+        solution_status(model),
+        objective,
+        np.nan if bound is None else bound,
+        solution,
+        time.perf_counter() - start,
+    )
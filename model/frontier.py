@@ -0,0 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+import os
+import numpy as np
+import pandas as pd
+import pulp
+from model.model_solver import solution_status
+from model.parametric_model import ParametricModel
+from preparation.compaction import amount
+
+FRONTIER_COLUMNS = [
+    "savings",
+    "grocery_per_week",
+    "status",
+    "objective",
+    "retained_spend",
+]
+# a shorter run of savings rates loses more to its cold first solve than it
+# gains from running in parallel
+MIN_CHUNK_POINTS = 4
+
+
+def sweep_frontier(
+    data: pd.DataFrame,
+    savings: Iterable[float] = np.linspace(0, 0.8, 17),
+    grocery_per_week: Iterable[float] = (50.0,),
+    processes: Optional[int] = None,
+) -> pd.DataFrame:
+    # a plan feasible at a higher savings rate stays feasible at a lower one,
+    # so each chunk walks the savings grid of one grocery value downwards and
+    # warm starts from the previous point
+    savings = sorted(set(savings), reverse=True)
+    groceries = sorted(set(grocery_per_week))
+    if not savings or not groceries:
+        return pd.DataFrame(columns=FRONTIER_COLUMNS)
+    processes = processes or os.cpu_count() or 1
+    # processes left over by the grocery values split their savings grids
+    # into contiguous runs, each long enough to gain from the warm starts
+    runs = min(
+        max(processes // len(groceries), 1),
+        max(len(savings) // MIN_CHUNK_POINTS, 1),
+    )
+    chunks = [
+        [(savings[i], g) for i in run]
+        for g in groceries
+        for run in np.array_split(np.arange(len(savings)), runs)
+    ]
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(chunks))) as executor:
+        rows = [
+            row
+            for chunk_rows in executor.map(solve_points, [data] * len(chunks), chunks)
+            for row in chunk_rows
+        ]
+
+    frontier = pd.DataFrame(rows, columns=FRONTIER_COLUMNS)
+    return frontier.sort_values(["grocery_per_week", "savings"]).reset_index(drop=True)
+
+
+def solve_points(data: pd.DataFrame, points: List[Tuple[float, float]]) -> List[tuple]:
+    parametric_model = ParametricModel(data, *points[0])
+    expense = amount(data, "Debit").abs()
+    rows = []
+    for s, g in points:
+        status = parametric_model.solve(s, g)
+        if status == pulp.LpStatusOptimal:
+            solution, objective = parametric_model.parse_solution()
+            retained_spend = (solution * expense).sum()
+        else:
+            objective, retained_spend = np.nan, np.nan
+        rows.append(
+            (
+                s,
+                g,
+                solution_status(parametric_model.model),
+                objective,
+                retained_spend,
+            )
+        )
+    return rows
@@ -0,0 +1,303 @@
+from typing import Optional, Tuple
+import logging
+import numpy as np
+import pandas as pd
+import pulp
+from model.model_creator import create_model
+from model.model_inputs import extract_model_inputs, group_grocery_by_week
+from model.model_solver import solve_model
+from model.solution_parser import parse_solution
+from preparation.compaction import amount
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-6
+# the search recurses once per core transaction
+MAX_CORE_SIZE = 500
+
+
+class NodeLimitReached(Exception):
+    pass
+
+
+def solve_knapsack(
+    data: pd.DataFrame,
+    savings: float,
+    grocery_per_week: float,
+    tolerance: float = 1e-6,
+    node_limit: int = 10000,
+) -> Tuple[pd.Series, float]:
+    inputs = extract_model_inputs(data)
+    cost, profit = inputs.expense, np.nan_to_num(inputs.importance)
+    capacity = (1 - savings) * abs(amount(data, "Debit").sum())
+
+    # rent is forced in, free transactions are always kept and costly ones
+    # that add nothing are dropped unless a grocery floor may need them
+    x = np.zeros(len(cost), dtype=np.int64)
+    x[inputs.is_rent | ((cost == 0) & (profit >= 0))] = 1
+    free = (x == 0) & (cost > 0) & ((profit > 0) | inputs.is_grocery)
+    capacity -= cost[x == 1].sum()
+
+    week = np.full(len(cost), -1, dtype=np.int64)
+    floors = []
+    for w, positions in group_grocery_by_week(inputs).items():
+        floor = min(cost[positions].sum(), grocery_per_week)
+        if floor > EPSILON:
+            week[positions] = len(floors)
+            floors.append(floor)
+    floors = np.array(floors)
+
+    if floors.sum() > capacity + EPSILON:
+        raise Exception("Cannot parse solution of infeasible model")
+
+    items = np.flatnonzero(free)
+    ratio = profit[items] / cost[items]
+    items = items[np.lexsort((cost[items], -ratio))]
+    integral = bool(np.all(np.mod(profit, 1) == 0))
+
+    search = KnapsackSearch(
+        cost[items], profit[items], week[items], floors, capacity, integral
+    )
+    search.set_incumbent(greedy_choice(search))
+    bound = search.root_bound()
+    core = search.reduced_cost_core()
+
+    proven = search.is_within(bound, tolerance)
+    if not proven and len(core) <= MAX_CORE_SIZE:
+        try:
+            search.run(core, node_limit)
+            proven = True
+        except NodeLimitReached:
+            proven = search.is_within(bound, tolerance)
+
+    if not proven:
+        logger.info("Knapsack search could not prove optimality, falling back to CBC")
+        model, decision_vars = create_model(data, savings, grocery_per_week)
+        solve_model(model, pulp.PULP_CBC_CMD(msg=False))
+        return parse_solution(data, decision_vars, model)
+    if search.best_choice is None:
+        raise Exception("Cannot parse solution of infeasible model")
+
+    x[items] = search.best_choice
+    solution = pd.Series(x, index=data.index, name="solution", dtype=np.int64)
+    return solution, float(np.dot(profit, x))
+
+
+class KnapsackSearch:
+    def __init__(
+        self,
+        cost: np.ndarray,
+        profit: np.ndarray,
+        week: np.ndarray,
+        floors: np.ndarray,
+        capacity: float,
+        integral: bool,
+    ):
+        self.cost = cost
+        self.profit = profit
+        self.week = week
+        self.floors = floors
+        self.capacity = capacity
+        self.integral = integral
+
+        self.capacity_bound = CapacityBound(cost, profit)
+        self.budget_price, self.floor_price = lp_prices(
+            cost, profit, week, floors, capacity
+        )
+        self.reduced_profit = profit - cost * (
+            self.budget_price - np.append(self.floor_price, 0.0)[week]
+        )
+
+        self.best_choice = None
+        self.best_value = -np.inf
+
+    def lagrangian_bound(
+        self, capacity: float, value: float, kept: np.ndarray, remaining: float
+    ) -> float:
+        # the budget and the grocery floors are priced with the LP duals,
+        # remaining is the positive reduced profit still undecided
+        return (
+            value
+            + self.budget_price * capacity
+            - np.dot(self.floor_price, self.floors - kept)
+            + remaining
+        )
+
+    def root_bound(self) -> float:
+        bound = min(
+            self.capacity_bound(0, self.capacity, 0.0), self.root_lagrangian_bound()
+        )
+        return np.floor(bound + EPSILON) if self.integral else bound
+
+    def is_within(self, bound: float, tolerance: float) -> bool:
+        return (
+            self.best_choice is not None
+            and bound - self.best_value <= tolerance * max(1.0, abs(bound))
+        )
+
+    def root_lagrangian_bound(self) -> float:
+        return self.lagrangian_bound(
+            self.capacity,
+            0.0,
+            np.zeros(len(self.floors)),
+            np.maximum(self.reduced_profit, 0).sum(),
+        )
+
+    def is_pruned(self, bound: float) -> bool:
+        if self.integral:
+            bound = np.floor(bound + EPSILON)
+        return bound <= self.best_value
+
+    def set_incumbent(self, choice: Optional[np.ndarray]):
+        if choice is not None:
+            self.best_choice = choice
+            self.best_value = float(np.dot(self.profit, choice))
+
+    def reduced_cost_core(self) -> np.ndarray:
+        # moving a transaction against the sign of its reduced profit lowers
+        # the bound by at least that much; when this alone closes the gap to
+        # the incumbent it keeps its preferred value and is not branched on
+        if self.best_choice is None:
+            return np.arange(len(self.cost))
+        flipped_bound = self.root_lagrangian_bound() - np.abs(self.reduced_profit)
+        if self.integral:
+            flipped_bound = np.floor(flipped_bound + EPSILON)
+        return np.flatnonzero(flipped_bound > self.best_value)
+
+    def run(self, core: np.ndarray, node_limit: int):
+        self.core = core
+        self.choice = (self.reduced_profit > 0).astype(np.int64)
+        self.choice[core] = 0
+        fixed = self.choice == 1
+        self.kept = week_sums(self.week[fixed], self.cost[fixed], len(self.floors))
+        self.available = week_sums(self.week[core], self.cost[core], len(self.floors))
+        self.remaining = np.concatenate(
+            [np.cumsum(np.maximum(self.reduced_profit[core], 0)[::-1])[::-1], [0.0]]
+        )
+        self.core_bound = CapacityBound(self.cost[core], self.profit[core])
+        self.nodes = 0
+        self.node_limit = node_limit
+        self.visit(
+            0,
+            self.capacity - self.cost[fixed].sum(),
+            float(self.profit[fixed].sum()),
+        )
+
+    def visit(self, k: int, capacity: float, value: float):
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            raise NodeLimitReached()
+        missing = np.maximum(self.floors - self.kept, 0)
+        if capacity < -EPSILON or missing.sum() > capacity + EPSILON:
+            return
+        if np.any(self.kept + self.available < self.floors - EPSILON):
+            return
+        if k == len(self.core):
+            if value > self.best_value:
+                self.best_value = value
+                self.best_choice = self.choice.copy()
+            return
+        bound = min(
+            self.core_bound(k, capacity, value),
+            self.lagrangian_bound(capacity, value, self.kept, self.remaining[k]),
+        )
+        if self.is_pruned(bound):
+            return
+
+        i = self.core[k]
+        c, w = self.cost[i], self.week[i]
+        if w >= 0:
+            self.available[w] -= c
+        self.choice[i] = 1
+        if w >= 0:
+            self.kept[w] += c
+        self.visit(k + 1, capacity - c, value + self.profit[i])
+        self.choice[i] = 0
+        if w >= 0:
+            self.kept[w] -= c
+        self.visit(k + 1, capacity, value)
+        if w >= 0:
+            self.available[w] += c
+
+
+class CapacityBound:
+    def __init__(self, cost: np.ndarray, profit: np.ndarray):
+        # items are sorted by ratio, so the ones with positive profit come
+        # first and the Dantzig bound is a lookup in their prefix sums
+        self.cost = cost
+        self.profit = profit
+        self.positive = int(np.count_nonzero(profit > 0))
+        self.cumulative_cost = np.concatenate([[0.0], np.cumsum(cost[: self.positive])])
+        self.cumulative_profit = np.concatenate(
+            [[0.0], np.cumsum(profit[: self.positive])]
+        )
+
+    def __call__(self, k: int, capacity: float, value: float) -> float:
+        # bound of the items from k on, ignoring the grocery floors
+        if k >= self.positive:
+            return value
+        target = self.cumulative_cost[k] + capacity
+        m = min(
+            int(np.searchsorted(self.cumulative_cost, target + EPSILON, "right")) - 1,
+            self.positive,
+        )
+        value += self.cumulative_profit[m] - self.cumulative_profit[k]
+        if m < self.positive:
+            value += (target - self.cumulative_cost[m]) * self.profit[m] / self.cost[m]
+        return value
+
+
+def lp_prices(
+    cost: np.ndarray,
+    profit: np.ndarray,
+    week: np.ndarray,
+    floors: np.ndarray,
+    capacity: float,
+) -> Tuple[float, np.ndarray]:
+    # the LP relaxation spends each grocery floor on the best ratio
+    # transactions of its week and the rest of the budget in ratio order,
+    # the ratios where each of them stops are the dual prices
+    ratio = profit / cost
+    reserved = np.zeros(len(cost))
+    floor_ratio = np.zeros(len(floors))
+    for w in range(len(floors)):
+        positions = np.flatnonzero(week == w)
+        before = np.cumsum(cost[positions]) - cost[positions]
+        reserved[positions] = np.clip(floors[w] - before, 0, cost[positions])
+        last = np.searchsorted(before, floors[w] - EPSILON, "left") - 1
+        floor_ratio[w] = ratio[positions[max(last, 0)]]
+
+    budget_price = 0.0
+    taken = np.cumsum(np.where(profit > 0, cost - reserved, 0.0))
+    m = int(np.searchsorted(taken, capacity - floors.sum() + EPSILON, "right"))
+    if m < len(cost) and profit[m] > 0:
+        budget_price = ratio[m]
+    return budget_price, np.maximum(budget_price - floor_ratio, 0.0)
+
+
+def week_sums(week: np.ndarray, cost: np.ndarray, weeks: int) -> np.ndarray:
+    in_week = week >= 0
+    return np.bincount(week[in_week], weights=cost[in_week], minlength=weeks).astype(
+        np.float64
+    )
+
+
+def greedy_choice(search: KnapsackSearch) -> Optional[np.ndarray]:
+    # cover every grocery floor with its best ratio transactions first, then
+    # fill the remaining budget in ratio order
+    choice = np.zeros(len(search.cost), dtype=np.int64)
+    kept = np.zeros(len(search.floors))
+    capacity = search.capacity
+    for i in np.flatnonzero(search.week >= 0):
+        w = search.week[i]
+        if kept[w] < search.floors[w] - EPSILON:
+            choice[i] = 1
+            kept[w] += search.cost[i]
+            capacity -= search.cost[i]
+    if capacity < -EPSILON:
+        return None
+    for i in np.flatnonzero((choice == 0) & (search.profit > 0)):
+        if search.cost[i] <= capacity + EPSILON:
+            choice[i] = 1
+            capacity -= search.cost[i]
+    return choice
@@ -1,46 +1,116 @@
-import pulp
-import pandas as pd
-
-
-def create_model(data: pd.DataFrame, savings: float, grocery_per_week: float):
-    total_expenditure = abs(data.sum()["Debit"])
-    model = pulp.LpProblem("Profit_maximizing_problem", pulp.constants.LpMaximize)
-    decision_vars = pulp.LpVariable.dicts(
-        "Transaction", data.index, 0, 1, pulp.LpInteger
-    )
-    objective = pulp.lpSum(
-        [decision_vars[t] * data.loc[t, "importance"] for t in data.index]
-    )
-    model += objective
-
-    savings_constraint = (
-        pulp.lpSum([decision_vars[t] * abs(data.loc[t, "Debit"]) for t in data.index])
-        <= (1 - savings) * total_expenditure
-    )
-    model += savings_constraint
-
-    for t in data.index:
-        if data.loc[t, "type"] == "rent":
-            model += decision_vars[t] == 1
-
-    agg_per_week = data[data["type"] == "grocery"].groupby("week").sum()
-    for w in agg_per_week.index:
-        week_grocery_spending = abs(agg_per_week.loc[w, "Debit"])
-        summed = sum(
-            [
-                abs(data.loc[t, "Debit"])
-                if (data.loc[t, "week"] == w) and (data.loc[t, "type"] == "grocery")
-                else 0.0
-                for t in data.index
-            ]
-        )
-        model += pulp.lpSum(
-            [
-                decision_vars[t] * abs(data.loc[t, "Debit"])
-                if (data.loc[t, "week"] == w) and (data.loc[t, "type"] == "grocery")
-                else 0.0
-                for t in data.index
-            ]
-        ) >= min(week_grocery_spending, grocery_per_week)
-
-    return model, decision_vars
+from typing import Any, List
+import pulp
+import pandas as pd
+import numpy as np
+from model.model_inputs import (
+    extract_model_inputs,
+    group_grocery_by_week,
+    group_identical_transactions,
+)
+from model.presolve import presolve_model
+from preparation.compaction import amount
+from instrumentation.recorder import set_counter, timed
+
+SAVINGS_CONSTRAINT = "savings"
+
+
+@timed("create_model")
+def create_model(
+    data: pd.DataFrame,
+    savings: float,
+    grocery_per_week: float,
+    presolve: bool = False,
+    aggregate: bool = False,
+):
+    inputs = extract_model_inputs(data)
+    total_expenditure = abs(amount(data, "Debit").sum())
+    model = pulp.LpProblem("Profit_maximizing_problem", pulp.constants.LpMaximize)
+    decision_vars = pulp.LpVariable.dicts(
+        "Transaction", data.index, 0, 1, pulp.LpInteger
+    )
+    variables = [decision_vars[t] for t in data.index]
+
+    budget = (1 - savings) * total_expenditure
+    grocery_floors = {
+        w: (positions, min(inputs.expense[positions].sum(), grocery_per_week))
+        for w, positions in group_grocery_by_week(inputs).items()
+    }
+    free = np.ones(len(variables), dtype=bool)
+    objective_offset = 0.0
+    if presolve:
+        # fixed transactions are left out of the model, their values are
+        # kept in the variable bounds for parse_solution
+        reduced = presolve_model(inputs, budget, grocery_floors)
+        free = reduced.fixed < 0
+        for p in np.flatnonzero(~free):
+            variables[p].bounds(int(reduced.fixed[p]), int(reduced.fixed[p]))
+        objective_offset = float(inputs.importance[reduced.fixed == 1].sum())
+        budget, grocery_floors = reduced.budget, reduced.grocery_floors
+
+    # every column of the model is represented by one of its transactions
+    count = np.ones(len(variables), dtype=np.int64)
+    if aggregate:
+        # identical transactions share one integer variable counting how
+        # many of them are kept, parse_solution expands it back to rows
+        groups = group_identical_transactions(data, inputs, free)
+        first = np.unique(groups, return_index=True)[1]
+        count = np.bincount(groups)[groups]
+        for p in first[count[first] > 1]:
+            variables[p] = pulp.LpVariable(
+                variables[p].name, 0, int(count[p]), pulp.LpInteger
+            )
+        variables = [variables[first[g]] for g in groups]
+        decision_vars = dict(zip(data.index, variables))
+        representative = np.zeros(len(variables), dtype=bool)
+        representative[first] = True
+    else:
+        representative = np.ones(len(variables), dtype=bool)
+    columns = np.flatnonzero(representative)
+    in_model = free[columns]
+
+    model += (
+        linear_expression(
+            [variables[p] for p in columns],
+            np.where(in_model, inputs.importance[columns], 0),
+        )
+        + objective_offset
+    )
+
+    savings_constraint = (
+        linear_expression(
+            [variables[p] for p in columns],
+            np.where(in_model, inputs.expense[columns], 0),
+        )
+        <= budget
+    )
+    model += savings_constraint, SAVINGS_CONSTRAINT
+
+    for p in columns[inputs.is_rent[columns] & in_model]:
+        model += variables[p] == int(count[p])
+
+    for w, (positions, week_grocery_floor) in grocery_floors.items():
+        positions = positions[representative[positions]]
+        model += (
+            linear_expression(
+                [variables[p] for p in positions], inputs.expense[positions]
+            )
+            >= week_grocery_floor,
+            grocery_constraint_name(w),
+        )
+
+    set_counter("model_rows", len(data))
+    set_counter("variables", int(np.count_nonzero(in_model)))
+    set_counter("constraints", len(model.constraints))
+    return model, decision_vars
+
+
+def grocery_constraint_name(week) -> str:
+    return f"grocery_week_{week}"
+
+
+def linear_expression(variables: List[Any], coefficients: np.ndarray):
+    # zero terms are left out, as pulp.lpSum does for var * 0
+    nonzero = np.flatnonzero(coefficients)
+    return pulp.LpAffineExpression(
+        zip([variables[p] for p in nonzero], coefficients[nonzero].tolist())
+    )
@@ -0,0 +1,68 @@
+from typing import Dict, Any, NamedTuple
+import pandas as pd
+import numpy as np
+from preparation.compaction import amount
+
+
+class ModelInputs(NamedTuple):
+    index: pd.Index
+    expense: np.ndarray
+    importance: np.ndarray
+    is_rent: np.ndarray
+    is_grocery: np.ndarray
+    week: np.ndarray
+
+
+def extract_model_inputs(data: pd.DataFrame) -> ModelInputs:
+    types = data["type"].to_numpy()
+    return ModelInputs(
+        index=data.index,
+        expense=np.abs(amount(data, "Debit").to_numpy(dtype=np.float64)),
+        importance=data["importance"].to_numpy(dtype=np.float64),
+        is_rent=types == "rent",
+        is_grocery=types == "grocery",
+        week=week_keys(data),
+    )
+
+
+def week_keys(data: pd.DataFrame) -> np.ndarray:
+    # ISO weeks repeat every year, so the ISO year is part of the key; the
+    # calendar year would split weeks around new year
+    week = data["week"].to_numpy(dtype=np.int64)
+    if "iso_year" in data.columns:
+        iso_year = data["iso_year"].to_numpy(dtype=np.int64)
+    elif "Booking date" in data.columns:
+        iso_year = data["Booking date"].dt.isocalendar().year.to_numpy(dtype=np.int64)
+    elif "year" in data.columns and data["year"].nunique() > 1:
+        raise Exception(
+            "Weeks of several years need an iso_year or Booking date column"
+        )
+    else:
+        return week
+    return iso_year * 100 + week
+
+
+def group_grocery_by_week(inputs: ModelInputs) -> Dict[Any, np.ndarray]:
+    positions = np.flatnonzero(inputs.is_grocery)
+    codes, weeks = pd.factorize(inputs.week[positions], sort=True)
+    order = np.argsort(codes, kind="stable")
+    groups = np.split(positions[order], np.cumsum(np.bincount(codes))[:-1])
+    return dict(zip(weeks.tolist(), groups))
+
+
+def group_identical_transactions(
+    data: pd.DataFrame, inputs: ModelInputs, free: np.ndarray
+) -> np.ndarray:
+    # transactions fixed in presolve stay on their own
+    key = np.zeros(len(data), dtype=np.int64)
+    for values in [
+        data["type"],
+        data["entity"],
+        inputs.week,
+        inputs.expense,
+        inputs.importance,
+    ]:
+        codes, uniques = pd.factorize(values)
+        key = pd.factorize(key * (len(uniques) + 1) + codes + 1)[0]
+    key[~free] = key.max(initial=0) + 1 + np.arange(np.count_nonzero(~free))
+    return pd.factorize(key)[0]
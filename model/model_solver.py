@@ -0,0 +1,88 @@
+from typing import Any, Dict, Optional
+import os
+import tempfile
+import pulp
+from instrumentation.recorder import active_recorder, parse_cbc_log, stage
+
+# objective magnitude under which the gap is taken as absolute
+GAP_EPSILON = 1e-9
+# the status of a plan stopped by the time limit or the gap before it was
+# proven optimal, every solver path reports it under this name
+FEASIBLE_STATUS = "Feasible"
+FEASIBLE_SOLUTIONS = [pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible]
+
+
+def solve_model(
+    model: pulp.LpProblem,
+    solver: Optional[pulp.LpSolver] = None,
+    time_limit: Optional[float] = None,
+    gap: Optional[float] = None,
+    statistics: bool = False,
+) -> int:
+    # with a time limit CBC stops at the deadline and keeps its best plan so
+    # far, with a gap it stops once the plan is proven within gap of optimal.
+    # The bound and node count are only printed to the CBC log, it is written
+    # and parsed when they are asked for or an instrument() is active
+    solver = solver or pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, gapRel=gap)
+    parse_log = isinstance(solver, pulp.PULP_CBC_CMD) and (
+        statistics or active_recorder() is not None
+    )
+    solver_statistics = {}
+    with stage("solve"):
+        if parse_log:
+            log_path = solver.optionsDict.get("logPath")
+            with tempfile.TemporaryDirectory() as directory:
+                solver.optionsDict["logPath"] = os.path.join(directory, "cbc.log")
+                try:
+                    status = model.solve(solver)
+                    with open(solver.optionsDict["logPath"]) as f:
+                        solver_statistics = parse_cbc_log(f.read())
+                finally:
+                    solver.optionsDict["logPath"] = log_path
+        else:
+            status = model.solve(solver)
+
+    # CBC reports a plan within the gap as optimal, only its log tells the
+    # two apart, so without the log a gap stop is assumed
+    gap = gap if gap is not None else getattr(solver, "optionsDict", {}).get("gapRel")
+    stopped_on_gap = (
+        "gap tolerance" in solver_statistics["result"]
+        if "result" in solver_statistics
+        else bool(gap)
+    )
+    proven_optimal = model.sol_status == pulp.LpSolutionOptimal and not stopped_on_gap
+    solver_statistics.update(
+        status=(
+            FEASIBLE_STATUS
+            if model.sol_status in FEASIBLE_SOLUTIONS and not proven_optimal
+            else pulp.LpStatus[model.status]
+        ),
+        solution_status=pulp.LpSolution[model.sol_status],
+        solution_seconds=model.solutionTime,
+        proven_optimal=proven_optimal,
+    )
+    solver_statistics.update(solution_gap(solver_statistics))
+    recorder = active_recorder()
+    if recorder is not None:
+        recorder.solver = solver_statistics
+    model.solver_statistics = solver_statistics
+    return status
+
+
+def solution_status(model: pulp.LpProblem) -> str:
+    return model.solver_statistics["status"]
+
+
+def solution_gap(statistics: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    # the gap printed by CBC is rounded, it is recomputed from the bound
+    objective, bound = statistics.get("objective"), statistics.get("bound")
+    if objective is None:
+        return {"bound": bound, "gap": None}
+    if bound is None:
+        if not statistics["proven_optimal"]:
+            return {"bound": None, "gap": None}
+        bound = objective
+    return {
+        "bound": bound,
+        "gap": abs(bound - objective) / max(abs(objective), GAP_EPSILON),
+    }
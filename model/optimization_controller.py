@@ -0,0 +1,243 @@
+from multiprocessing.connection import Connection
+from typing import Callable, NamedTuple, Optional, Tuple
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import pandas as pd
+from model.solution_cache import CachedSolution, SolutionCache, solve_warm
+
+logger = logging.getLogger(__name__)
+
+# slider changes closer together than this only solve the last one
+DEBOUNCE_SECONDS = 0.3
+# how often the worker checks for a newer request while CBC runs
+POLL_SECONDS = 0.05
+# solves are started from a single threaded server process, forking the
+# kernel itself copies the locks its other threads hold
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class OptimizationResult(NamedTuple):
+    savings: float
+    grocery_per_week: float
+    status: str
+    solution: Optional[pd.Series]
+    objective: float
+    seconds: float
+
+
+class OptimizationController:
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        on_result: Callable[[OptimizationResult], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+        debounce: float = DEBOUNCE_SECONDS,
+        time_limit: Optional[float] = None,
+        gap: Optional[float] = None,
+        cache: Optional[SolutionCache] = None,
+    ):
+        # callbacks run on the worker thread, never on the caller's
+        self.data = data
+        self.on_result = on_result
+        self.on_error = on_error or (
+            lambda e: logger.warning(f"Optimization failed: {e}")
+        )
+        self.debounce = debounce
+        self.time_limit = time_limit
+        self.gap = gap
+        self.cache = cache
+
+        self._condition = threading.Condition()
+        self._pending: Optional[Tuple[float, float]] = None
+        self._due = 0.0
+        self._generation = 0
+        self._solving = False
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def request(self, savings: float, grocery_per_week: float):
+        # a newer request replaces the pending one and stops a running solve
+        with self._condition:
+            if self._closed:
+                raise Exception("Optimization controller is closed")
+            self._pending = (savings, grocery_per_week)
+            self._due = time.monotonic() + self.debounce
+            self._generation += 1
+            self._condition.notify_all()
+
+    def cancel(self):
+        with self._condition:
+            self._pending = None
+            self._generation += 1
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._generation += 1
+            self._condition.notify_all()
+        self._worker.join()
+
+    @property
+    def busy(self) -> bool:
+        with self._condition:
+            return self._solving or self._pending is not None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (
+                    self._pending is None or time.monotonic() < self._due
+                ):
+                    self._condition.wait(
+                        None
+                        if self._pending is None
+                        else max(self._due - time.monotonic(), 0)
+                    )
+                if self._closed:
+                    return
+                savings, grocery_per_week = self._pending
+                self._pending = None
+                generation = self._generation
+                self._solving = True
+            try:
+                self._solve(savings, grocery_per_week, generation)
+            except Exception:
+                # a failing callback must not stop the worker, later requests
+                # would be dropped
+                logger.exception("Optimization callback failed")
+            finally:
+                with self._condition:
+                    self._solving = False
+
+    def _solve(self, savings: float, grocery_per_week: float, generation: int):
+        start = time.perf_counter()
+        warm_start = None
+        if self.cache is not None:
+            cached = self.cache.lookup(self.data, savings, grocery_per_week)
+            if cached is not None:
+                self._report(savings, grocery_per_week, cached, start, generation)
+                return
+            warm_start = self.cache.warm_start(self.data, savings, grocery_per_week)
+
+        context = multiprocessing.get_context(START_METHOD)
+        if START_METHOD == "forkserver":
+            # the server imports pandas and pulp once instead of every solve,
+            # this only takes effect before the server has started
+            context.set_forkserver_preload([__name__])
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=solve_in_process,
+            args=(
+                sender,
+                self.data,
+                savings,
+                grocery_per_week,
+                warm_start,
+                self.time_limit,
+                self.gap,
+            ),
+            daemon=True,
+        )
+        process.start()
+        sender.close()
+        try:
+            while not receiver.poll(POLL_SECONDS):
+                if self._stale(generation):
+                    stop_process(process)
+                    return
+                if not process.is_alive() and not receiver.poll():
+                    raise Exception(
+                        f"Optimization process exited with code {process.exitcode}"
+                    )
+            kind, payload = receiver.recv()
+        except Exception as e:
+            if not self._stale(generation):
+                self.on_error(e)
+            return
+        finally:
+            receiver.close()
+            process.join(POLL_SECONDS)
+            if process.is_alive():
+                stop_process(process)
+
+        if kind == "error":
+            if not self._stale(generation):
+                self.on_error(Exception(payload))
+            return
+        # a result that arrives after a newer request is still worth keeping
+        if self.cache is not None:
+            self.cache.store(self.data, savings, grocery_per_week, payload)
+        self._report(savings, grocery_per_week, payload, start, generation)
+
+    def _report(
+        self,
+        savings: float,
+        grocery_per_week: float,
+        result: CachedSolution,
+        start: float,
+        generation: int,
+    ):
+        if self._stale(generation):
+            return
+        self.on_result(
+            OptimizationResult(
+                savings,
+                grocery_per_week,
+                result.status,
+                result.solution,
+                result.objective,
+                time.perf_counter() - start,
+            )
+        )
+
+    def _stale(self, generation: int) -> bool:
+        with self._condition:
+            return generation != self._generation
+
+
+def solve_in_process(
+    connection: Connection,
+    data: pd.DataFrame,
+    savings: float,
+    grocery_per_week: float,
+    warm_start: Optional[pd.Series],
+    time_limit: Optional[float],
+    gap: Optional[float],
+):
+    # CBC runs in a child of this process, a session of their own lets the
+    # controller stop both at once
+    if hasattr(os, "setsid"):
+        os.setsid()
+    try:
+        connection.send(
+            (
+                "result",
+                solve_warm(
+                    data, savings, grocery_per_week, warm_start, time_limit, gap
+                ),
+            )
+        )
+    except Exception as e:
+        connection.send(("error", str(e)))
+    finally:
+        connection.close()
+
+
+def stop_process(process: multiprocessing.process.BaseProcess):
+    # the group does not exist yet if the process has not reached setsid
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    process.terminate()
+    process.join()
@@ -0,0 +1,65 @@
+from typing import Optional
+import pulp
+import pandas as pd
+from model.model_creator import (
+    create_model,
+    grocery_constraint_name,
+    SAVINGS_CONSTRAINT,
+)
+from model.model_inputs import extract_model_inputs, group_grocery_by_week
+from model.model_solver import solve_model
+from model.solution_parser import parse_solution
+from preparation.compaction import amount
+
+
+class ParametricModel:
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        savings: float,
+        grocery_per_week: float,
+        solver: Optional[pulp.LpSolver] = None,
+        time_limit: Optional[float] = None,
+        gap: Optional[float] = None,
+    ):
+        self.data = data
+        self.savings = savings
+        self.grocery_per_week = grocery_per_week
+        self.model, self.decision_vars = create_model(data, savings, grocery_per_week)
+        self.solver = solver or pulp.PULP_CBC_CMD(
+            msg=False, warmStart=True, timeLimit=time_limit, gapRel=gap
+        )
+
+        inputs = extract_model_inputs(data)
+        self.total_expenditure = abs(amount(data, "Debit").sum())
+        self.week_grocery_spending = {
+            w: inputs.expense[positions].sum()
+            for w, positions in group_grocery_by_week(inputs).items()
+        }
+
+    def update(
+        self, savings: Optional[float] = None, grocery_per_week: Optional[float] = None
+    ):
+        constraints = self.model.constraints
+        if savings is not None and savings != self.savings:
+            constraints[SAVINGS_CONSTRAINT].changeRHS(
+                (1 - savings) * self.total_expenditure
+            )
+            self.savings = savings
+        if grocery_per_week is not None and grocery_per_week != self.grocery_per_week:
+            for w, week_grocery_spending in self.week_grocery_spending.items():
+                constraints[grocery_constraint_name(w)].changeRHS(
+                    min(week_grocery_spending, grocery_per_week)
+                )
+            self.grocery_per_week = grocery_per_week
+
+    def solve(
+        self, savings: Optional[float] = None, grocery_per_week: Optional[float] = None
+    ) -> int:
+        # variable values left by the previous solve are passed to CBC as
+        # the starting incumbent
+        self.update(savings, grocery_per_week)
+        return solve_model(self.model, self.solver)
+
+    def parse_solution(self):
+        return parse_solution(self.data, self.decision_vars, self.model)
@@ -0,0 +1,96 @@
+from typing import Any, Dict, NamedTuple, Tuple
+import numpy as np
+from model.model_inputs import ModelInputs
+
+EPSILON = 1e-6
+
+
+class PresolveResult(NamedTuple):
+    fixed: np.ndarray
+    budget: float
+    grocery_floors: Dict[Any, Tuple[np.ndarray, float]]
+
+
+def presolve_model(
+    inputs: ModelInputs,
+    budget: float,
+    grocery_floors: Dict[Any, Tuple[np.ndarray, float]],
+) -> PresolveResult:
+    cost, importance = inputs.expense, inputs.importance
+    # -1 marks transactions that stay in the model
+    fixed = np.full(len(cost), -1, dtype=np.int64)
+    fixed[inputs.is_rent] = 1
+    zero_cost = (fixed < 0) & (cost == 0)
+    fixed[zero_cost] = np.where(importance[zero_cost] < 0, 0, 1)
+
+    floors = dict(grocery_floors)
+    changed = True
+    while changed:
+        changed = False
+        remaining = budget - cost[fixed == 1].sum()
+        too_expensive = (fixed < 0) & (cost > remaining + EPSILON)
+        if too_expensive.any():
+            fixed[too_expensive] = 0
+            changed = True
+
+        for w, (positions, rhs) in list(floors.items()):
+            missing = rhs - cost[positions[fixed[positions] == 1]].sum()
+            free = positions[fixed[positions] < 0]
+            available = cost[free].sum()
+            if missing <= EPSILON:
+                del floors[w]
+                changed = True
+            elif abs(available - missing) <= EPSILON:
+                # the floor needs every grocery transaction left in its week
+                fixed[free] = 1
+                del floors[w]
+                changed = True
+
+        in_floor = np.zeros(len(cost), dtype=bool)
+        floor_need = 0.0
+        for positions, rhs in floors.values():
+            in_floor[positions] = True
+            floor_need += rhs - cost[positions[fixed[positions] == 1]].sum()
+        useless = (fixed < 0) & ~in_floor & (importance <= 0)
+        if useless.any():
+            fixed[useless] = 0
+            changed = True
+
+        outside = np.flatnonzero((fixed < 0) & ~in_floor)
+        dropped = dominated(cost, importance, outside, remaining - floor_need)
+        if len(dropped):
+            fixed[dropped] = 0
+            changed = True
+
+    floors = {
+        w: (
+            positions[fixed[positions] < 0],
+            rhs - cost[positions[fixed[positions] == 1]].sum(),
+        )
+        for w, (positions, rhs) in floors.items()
+    }
+    return PresolveResult(
+        fixed=fixed,
+        budget=budget - cost[fixed == 1].sum(),
+        grocery_floors=floors,
+    )
+
+
+def dominated(
+    cost: np.ndarray, importance: np.ndarray, candidates: np.ndarray, capacity: float
+) -> np.ndarray:
+    # some optimal plan keeps every transaction that is at most as expensive
+    # and at least as important as one it keeps, so a transaction that does
+    # not fit together with all of those can be dropped
+    order = candidates[np.lexsort((cost[candidates], -importance[candidates]))]
+    needed = cost[order].copy()
+    for level in np.unique(importance[order]):
+        in_level = order[importance[order] == level]
+        cumulative = np.concatenate([[0.0], np.cumsum(cost[in_level])])
+        lower = importance[order] < level
+        needed[lower] += cumulative[
+            np.searchsorted(cost[in_level], cost[order][lower], "right")
+        ]
+        same = importance[order] == level
+        needed[same] += cumulative[:-1]
+    return order[needed > capacity + EPSILON]
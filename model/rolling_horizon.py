@@ -0,0 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+import os
+import numpy as np
+import pandas as pd
+from model.model_creator import create_model
+from model.model_inputs import week_keys
+from model.model_solver import FEASIBLE_SOLUTIONS, solution_status, solve_model
+from model.solution_parser import parse_solution
+from preparation.compaction import amount
+
+WINDOW_MONTHS = {"month": 1, "quarter": 3}
+
+
+class RollingResult(NamedTuple):
+    solution: pd.Series
+    objective: float
+    windows: pd.DataFrame
+
+
+def optimize_rolling(
+    data: pd.DataFrame,
+    savings: float,
+    grocery_per_week: float,
+    window: str = "month",
+    carry_over: bool = True,
+    processes: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    gap: Optional[float] = None,
+) -> RollingResult:
+    # each window gets the savings rate of its own spending plus, with
+    # carry_over, the budget left unspent by the earlier windows of its ISO
+    # year, so every year still meets the savings rate and no model is
+    # larger than a window. Windows of a year depend on each other through
+    # the carried budget, years are solved in parallel
+    chains = [
+        [(key, data.iloc[positions]) for key, positions in chain]
+        for chain in window_chains(window_keys(data, window), carry_over)
+    ]
+    processes = min(processes or os.cpu_count() or 1, max(len(chains), 1))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = list(
+            executor.map(
+                solve_chain,
+                chains,
+                [savings] * len(chains),
+                [grocery_per_week] * len(chains),
+                [time_limit] * len(chains),
+                [gap] * len(chains),
+            )
+        )
+
+    rows = [row for chain_rows, _ in results for row in chain_rows]
+    summary = pd.DataFrame(
+        rows,
+        columns=[
+            "iso_year",
+            "window",
+            "rows",
+            "budget",
+            "spent",
+            "carried",
+            "status",
+            "objective",
+        ],
+    )
+    solutions = [s for _, chain_solutions in results for s in chain_solutions]
+    solution = (
+        pd.concat(solutions).reindex(data.index)
+        if solutions
+        else pd.Series(np.nan, index=data.index)
+    ).rename("solution")
+    return RollingResult(
+        solution,
+        summary["objective"].sum(min_count=1),
+        summary.sort_values(["iso_year", "window"], ignore_index=True),
+    )
+
+
+def window_keys(data: pd.DataFrame, window: str) -> pd.DataFrame:
+    # a week belongs to the ISO year and to the month of its Thursday, like
+    # ISO weeks belong to years, so neither a grocery floor nor a week
+    # around new year spans two windows or two years
+    if window not in WINDOW_MONTHS:
+        raise Exception(
+            f"Unknown window {window}, expected one of {list(WINDOW_MONTHS)}"
+        )
+    codes, weeks = pd.factorize(week_keys(data))
+    if len(weeks) == 0 or weeks.min() < 100:
+        # without a year the weeks cannot be placed in months, the data is
+        # taken as a single window
+        return pd.DataFrame({"iso_year": 0, "window": 1}, index=data.index)
+    thursdays = pd.to_datetime(
+        [f"{w // 100}-W{w % 100:02d}-4" for w in weeks], format="%G-W%V-%u"
+    )
+    return pd.DataFrame(
+        {
+            "iso_year": (weeks // 100)[codes],
+            "window": ((thursdays.month - 1) // WINDOW_MONTHS[window] + 1)[codes],
+        },
+        index=data.index,
+    )
+
+
+def window_chains(
+    windows: pd.DataFrame, carry_over: bool
+) -> List[List[Tuple[Tuple[int, int], np.ndarray]]]:
+    groups = windows.groupby(["iso_year", "window"], sort=True).indices
+    chains = {}
+    for key, positions in groups.items():
+        chains.setdefault(key[0] if carry_over else key, []).append((key, positions))
+    return list(chains.values())
+
+
+def solve_chain(
+    windows: List[Tuple[Tuple[int, int], pd.DataFrame]],
+    savings: float,
+    grocery_per_week: float,
+    time_limit: Optional[float],
+    gap: Optional[float],
+) -> Tuple[List[tuple], List[pd.Series]]:
+    rows, solutions = [], []
+    carried = 0.0
+    for (year, window), window_data in windows:
+        spending = abs(amount(window_data, "Debit").sum())
+        budget = (1 - savings) * spending + carried
+        # create_model derives the budget from a savings rate
+        window_savings = 1 - budget / spending if spending > 0 else 0.0
+        model, decision_vars = create_model(
+            window_data, window_savings, grocery_per_week
+        )
+        solve_model(model, time_limit=time_limit, gap=gap)
+        if model.sol_status in FEASIBLE_SOLUTIONS:
+            solution, objective = parse_solution(window_data, decision_vars, model)
+            spent = float((solution * amount(window_data, "Debit").abs()).sum())
+            solutions.append(solution)
+        else:
+            # an infeasible window keeps its carried budget for the next one
+            objective, spent = np.nan, 0.0
+        rows.append(
+            (
+                year,
+                window,
+                len(window_data),
+                budget,
+                spent,
+                carried,
+                solution_status(model),
+                objective,
+            )
+        )
+        carried = budget - spent
+    return rows, solutions
@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+import hashlib
+import numpy as np
+import pandas as pd
+import pulp
+from model.model_creator import create_model
+from model.model_solver import FEASIBLE_SOLUTIONS, solution_status, solve_model
+from model.solution_parser import parse_solution
+
+
+class CachedSolution(NamedTuple):
+    status: str
+    solution: Optional[pd.Series]
+    objective: float
+    # optimal or infeasible, as opposed to stopped by the time limit
+    proven: bool
+
+
+def frame_hash(data: pd.DataFrame) -> str:
+    digest = hashlib.sha256()
+    digest.update(repr(list(data.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, float, float], CachedSolution]" = (
+            OrderedDict()
+        )
+
+    def lookup(
+        self, data: pd.DataFrame, savings: float, grocery_per_week: float
+    ) -> Optional[CachedSolution]:
+        return self._lookup(frame_hash(data), savings, grocery_per_week)
+
+    def warm_start(
+        self, data: pd.DataFrame, savings: float, grocery_per_week: float
+    ) -> Optional[pd.Series]:
+        return self._warm_start(frame_hash(data), savings, grocery_per_week)
+
+    def store(
+        self,
+        data: pd.DataFrame,
+        savings: float,
+        grocery_per_week: float,
+        result: CachedSolution,
+    ):
+        self._store(frame_hash(data), savings, grocery_per_week, result)
+
+    def solve(
+        self,
+        data: pd.DataFrame,
+        savings: float,
+        grocery_per_week: float,
+        time_limit: Optional[float] = None,
+        gap: Optional[float] = None,
+    ) -> CachedSolution:
+        key = frame_hash(data)
+        cached = self._lookup(key, savings, grocery_per_week)
+        if cached is not None:
+            return cached
+        result = solve_warm(
+            data,
+            savings,
+            grocery_per_week,
+            self._warm_start(key, savings, grocery_per_week),
+            time_limit,
+            gap,
+        )
+        self._store(key, savings, grocery_per_week, result)
+        return result
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def _lookup(
+        self, key: str, savings: float, grocery_per_week: float
+    ) -> Optional[CachedSolution]:
+        # plans stopped by a time limit are only used as warm starts
+        entry = self.entries.get((key, savings, grocery_per_week))
+        if entry is not None and entry.proven:
+            self.entries.move_to_end((key, savings, grocery_per_week))
+            return copy_result(entry)
+        # raising the savings rate shrinks the budget and raising the grocery
+        # floor tightens every week, so a looser infeasible setting makes
+        # this one infeasible too
+        for (k, s, g), entry in self.entries.items():
+            if (
+                k == key
+                and s <= savings
+                and g <= grocery_per_week
+                and entry.status == pulp.LpStatus[pulp.LpStatusInfeasible]
+            ):
+                return CachedSolution(entry.status, None, np.nan, True)
+        return None
+
+    def _warm_start(
+        self, key: str, savings: float, grocery_per_week: float
+    ) -> Optional[pd.Series]:
+        # for the same reason a plan feasible at a tighter setting is
+        # feasible here, the best of them is the starting incumbent
+        candidates = [
+            entry
+            for (k, s, g), entry in self.entries.items()
+            if k == key
+            and s >= savings
+            and g >= grocery_per_week
+            and entry.solution is not None
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda entry: entry.objective).solution
+
+    def _store(
+        self, key: str, savings: float, grocery_per_week: float, result: CachedSolution
+    ):
+        self.entries[(key, savings, grocery_per_week)] = copy_result(result)
+        self.entries.move_to_end((key, savings, grocery_per_week))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+def solve_warm(
+    data: pd.DataFrame,
+    savings: float,
+    grocery_per_week: float,
+    warm_start: Optional[pd.Series] = None,
+    time_limit: Optional[float] = None,
+    gap: Optional[float] = None,
+) -> CachedSolution:
+    model, decision_vars = create_model(data, savings, grocery_per_week)
+    if warm_start is not None:
+        values = warm_start.loc[data.index].to_numpy()
+        for t, value in zip(data.index, values):
+            decision_vars[t].setInitialValue(int(value))
+    solve_model(
+        model,
+        pulp.PULP_CBC_CMD(
+            msg=False,
+            warmStart=warm_start is not None,
+            timeLimit=time_limit,
+            gapRel=gap,
+        ),
+        # the gap of a plan stopped early is shown to the user
+        statistics=time_limit is not None or gap is not None,
+    )
+    if model.sol_status not in FEASIBLE_SOLUTIONS:
+        return CachedSolution(
+            pulp.LpStatus[model.status],
+            None,
+            np.nan,
+            model.status == pulp.LpStatusInfeasible,
+        )
+    solution, objective = parse_solution(data, decision_vars, model)
+    return CachedSolution(
+        solution_status(model),
+        solution,
+        objective,
+        solution.attrs["proven_optimal"],
+    )
+
+
+def copy_result(result: CachedSolution) -> CachedSolution:
+    # callers join and modify the solutions they get
+    if result.solution is None:
+        return result
+    return result._replace(solution=result.solution.copy())
@@ -3,26 +3,65 @@ from typing import Dict, Any, Tuple
 import pulp
 import logging
 import numpy as np
+from instrumentation.recorder import timed
 
 logger = logging.getLogger(__name__)
 
 
+@timed("parse_solution")
 def parse_solution(
     data: pd.DataFrame, decision_vars: Dict[int, Any], model
 ) -> Tuple[pd.Series, float]:
-    if model.status != pulp.const.LpStatusOptimal:
+    # a plan found before the time limit is feasible but not proven optimal,
+    # its bound and gap are in the solver statistics
+    feasible = model.sol_status == pulp.LpSolutionIntegerFeasible
+    if model.status != pulp.const.LpStatusOptimal and not feasible:
         raise Exception(f"Cannot parse solution of not optimally solved model")
 
-    logging.info(f"Status is optimal, parsing solution")
+    statistics = getattr(model, "solver_statistics", None)
+    if feasible:
+        gap = (statistics or {}).get("gap")
+        logging.info(
+            f"Solution is feasible but not proven optimal, gap {gap}, parsing solution"
+        )
+    else:
+        logging.info(f"Status is optimal, parsing solution")
+    # a variable shared by several identical transactions counts how many of
+    # them are kept, the first ones in index order get the 1s
+    assigned = {}
+    values = []
+    for t in data.index:
+        variable = decision_vars[t]
+        kept = int(round(variable_value(variable)))
+        values.append(1 if assigned.get(variable.name, 0) < kept else 0)
+        assigned[variable.name] = assigned.get(variable.name, 0) + 1
     df = pd.Series(
-        [
-            decision_vars[t].varValue if decision_vars[t].varValue is not None else 1
-            for t in data.index
-        ],
+        values,
         index=data.index,
         name="solution",
         dtype=np.int64,
     )
-    objective = pulp.value(model.objective)
+    objective = objective_value(model.objective)
+    df.attrs["proven_optimal"] = (statistics or {}).get("proven_optimal", not feasible)
+    if statistics is not None:
+        df.attrs["solver_statistics"] = statistics
 
     return df, objective
+
+
+def objective_value(objective) -> float:
+    # pulp.value gives None for an objective without variables, as left by a
+    # presolve that fixes every transaction, the fixed ones are the constant
+    return objective.constant + sum(
+        coefficient * variable_value(variable)
+        for variable, coefficient in objective.items()
+    )
+
+
+def variable_value(variable) -> float:
+    if variable.varValue is not None:
+        return variable.varValue
+    # transactions fixed in presolve are not part of the model
+    if variable.lowBound is not None and variable.lowBound == variable.upBound:
+        return variable.lowBound
+    return variable.upBound if variable.upBound is not None else 1
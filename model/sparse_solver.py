@@ -0,0 +1,149 @@
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import csr_matrix
+from model.model_inputs import (
+    extract_model_inputs,
+    group_grocery_by_week,
+    group_identical_transactions,
+)
+from model.model_solver import FEASIBLE_STATUS, GAP_EPSILON
+from model.presolve import presolve_model
+from preparation.compaction import amount
+from instrumentation.recorder import active_recorder, stage
+
+# CBC's ratioGap when none is given, HiGHS would stop at 1e-4
+CBC_DEFAULT_GAP = 0.0
+MILP_STATUS = {
+    0: "Optimal",
+    1: "Not Solved",
+    2: "Infeasible",
+    3: "Unbounded",
+    4: "Undefined",
+}
+
+
+def solve_sparse(
+    data: pd.DataFrame,
+    savings: float,
+    grocery_per_week: float,
+    presolve: bool = False,
+    aggregate: bool = False,
+    time_limit: Optional[float] = None,
+    gap: Optional[float] = None,
+) -> Tuple[pd.Series, float]:
+    # same model as create_model, built as arrays and solved in process by
+    # HiGHS without an LP file or a solver process; the result has the shape
+    # of parse_solution. CBC is faster on the ledgers measured so far, so
+    # this backend is opt-in
+    with stage("create_model"):
+        inputs = extract_model_inputs(data)
+        cost, importance = inputs.expense, inputs.importance
+        budget = (1 - savings) * abs(amount(data, "Debit").sum())
+        grocery_floors = {
+            w: (positions, min(cost[positions].sum(), grocery_per_week))
+            for w, positions in group_grocery_by_week(inputs).items()
+        }
+
+        lower = inputs.is_rent.astype(np.float64)
+        upper = np.ones(len(cost))
+        free = np.ones(len(cost), dtype=bool)
+        if presolve:
+            # fixed transactions keep their columns with equal bounds, so the
+            # original budget and floors stay valid
+            fixed = presolve_model(inputs, budget, grocery_floors).fixed
+            free = fixed < 0
+            lower[~free] = upper[~free] = fixed[~free]
+
+        # with aggregate, identical transactions share one integer column
+        # counting how many of them are kept
+        groups = (
+            group_identical_transactions(data, inputs, free)
+            if aggregate
+            else np.arange(len(cost))
+        )
+        group_count = int(groups.max(initial=-1)) + 1
+        # each column takes its coefficients from the first transaction
+        first = np.unique(groups, return_index=True)[1]
+        representative = np.zeros(len(cost), dtype=bool)
+        representative[first] = True
+
+        budget_columns = np.flatnonzero(representative & (cost != 0))
+        floor_columns = [
+            positions[representative[positions]]
+            for positions, _ in grocery_floors.values()
+        ]
+        rows = np.concatenate(
+            [np.zeros(len(budget_columns), dtype=np.int64)]
+            + [np.full(len(p), r + 1) for r, p in enumerate(floor_columns)]
+        )
+        columns = np.concatenate([budget_columns] + floor_columns).astype(np.int64)
+        matrix = csr_matrix(
+            (cost[columns], (rows, groups[columns])),
+            shape=(1 + len(floor_columns), group_count),
+        )
+        floors = np.array([floor for _, floor in grocery_floors.values()])
+        constraints = LinearConstraint(
+            matrix,
+            np.concatenate([[-np.inf], floors]),
+            np.concatenate([[budget], np.full(len(floors), np.inf)]),
+        )
+
+    # like solve_model, no gap means a proven optimum as CBC's default
+    options = {"mip_rel_gap": CBC_DEFAULT_GAP if gap is None else gap}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+    with stage("solve"):
+        result = milp(
+            -importance[first],
+            constraints=constraints,
+            integrality=np.ones(group_count),
+            bounds=Bounds(
+                np.bincount(groups, lower, group_count),
+                np.bincount(groups, upper, group_count),
+            ),
+            options=options,
+        )
+
+    # HiGHS keeps its best plan when the time limit stops it, and like CBC
+    # it reports a plan within the gap as optimal
+    feasible = result.status == 1 and result.x is not None
+    bound = getattr(result, "mip_dual_bound", None)
+    mip_gap = getattr(result, "mip_gap", None)
+    proven_optimal = result.status == 0 and (
+        not gap or (mip_gap is not None and mip_gap <= GAP_EPSILON)
+    )
+    statistics = {
+        "result": result.message,
+        "objective": None if result.fun is None else -result.fun,
+        "bound": None if bound is None else -bound,
+        "nodes": getattr(result, "mip_node_count", None),
+        "gap": mip_gap,
+        "status": (
+            FEASIBLE_STATUS
+            if (result.status == 0 or feasible) and not proven_optimal
+            else MILP_STATUS.get(result.status, "Undefined")
+        ),
+        "proven_optimal": proven_optimal,
+    }
+    recorder = active_recorder()
+    if recorder is not None:
+        recorder.solver = statistics
+
+    if result.status != 0 and not feasible:
+        raise Exception(f"Cannot parse solution of not optimally solved model")
+    # the first transactions of a group in index order are the kept ones
+    sizes = np.bincount(groups, minlength=group_count)
+    order = np.argsort(groups, kind="stable")
+    rank = np.empty(len(groups), dtype=np.int64)
+    rank[order] = np.arange(len(groups)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    solution = pd.Series(
+        (rank < np.round(result.x).astype(np.int64)[groups]).astype(np.int64),
+        index=data.index,
+        name="solution",
+        dtype=np.int64,
+    )
+    solution.attrs["proven_optimal"] = statistics["proven_optimal"]
+    solution.attrs["solver_statistics"] = statistics
+    return solution, float(np.dot(importance, solution.to_numpy()))
@@ -0,0 +1,85 @@
+from typing import Dict, List, Tuple, Iterable
+import hashlib
+import json
+import sqlite3
+import time
+
+
+def rules_hash(types_mapping: Dict[str, List[str]]) -> str:
+    # dict order decides which category wins, so it is part of the hash
+    return hashlib.sha256(json.dumps(types_mapping).encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    def __init__(
+        self,
+        path: str,
+        types_mapping: Dict[str, List[str]],
+        max_entries: int = 100000,
+        batch_size: int = 500,
+    ):
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, type TEXT, entity TEXT, last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            """)
+        current_hash = rules_hash(types_mapping)
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE name = 'rules_hash'"
+        ).fetchone()
+        if row is None or row[0] != current_hash:
+            with self.connection:
+                self.connection.execute("DELETE FROM entries")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('rules_hash', ?)",
+                    (current_hash,),
+                )
+
+    def lookup(self, keys: List[str]) -> Dict[str, Tuple[str, str]]:
+        found = {}
+        now = time.time()
+        with self.connection:
+            for batch in self._batches(keys):
+                placeholders = ",".join("?" * len(batch))
+                rows = self.connection.execute(
+                    f"SELECT key, type, entity FROM entries WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                self.connection.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(now, key) for key, _, _ in rows],
+                )
+                found.update({key: (t, e) for key, t, e in rows})
+        return found
+
+    def store(self, entries: Dict[str, Tuple[str, str]]):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                [(key, t, e, now) for key, (t, e) in entries.items()],
+            )
+            self.connection.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY last_used
+                    LIMIT MAX((SELECT COUNT(*) FROM entries) - ?, 0)
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def _batches(self, keys: List[str]) -> Iterable[List[str]]:
+        for start in range(0, len(keys), self.batch_size):
+            yield keys[start : start + self.batch_size]
@@ -0,0 +1,124 @@
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from preparation.classification_cache import rules_hash
+
+PARTITION_COLUMNS = ["year", "month"]
+# files starting with an underscore are not read as part of the dataset
+KEY_FILE = "_input_key"
+# part of every key, raised when prepare_data changes the stored columns
+STORE_VERSION = 1
+# columns read by create_model and by the visualizers, amounts are found in
+# either layout of compaction
+MODEL_COLUMNS = ["Debit", "type", "year", "iso_year", "week"]
+VISUALIZATION_COLUMNS = [
+    "Debit",
+    "Credit",
+    "type",
+    "entity",
+    "year",
+    "month",
+    "week",
+    "iso_year",
+    "weekday",
+]
+
+
+def input_key(source: Dict[str, Any], types_mapping: Dict[str, List[str]]) -> str:
+    # the inputs are described rather than read, by the generator parameters
+    # or by file_source, so a session checks the store before loading them;
+    # the rules they are classified with are part of the key
+    return hashlib.sha256(
+        json.dumps(
+            {
+                "version": STORE_VERSION,
+                "rules": rules_hash(types_mapping),
+                "source": source,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def file_source(paths: Iterable[str]) -> Dict[str, Any]:
+    # input files are told apart by size and modification time
+    source = {}
+    for p in paths:
+        status = os.stat(p)
+        source[os.path.abspath(p)] = [status.st_size, status.st_mtime_ns]
+    return source
+
+
+def read_store_key(path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, KEY_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def write_prepared(data: pd.DataFrame, path: str, key: Optional[str] = None):
+    # the months in data replace the ones already stored, the other months
+    # are kept, so a store can be extended one month at a time. A store
+    # prepared from other inputs is replaced as a whole
+    if key is not None and read_store_key(path) != key:
+        shutil.rmtree(path, ignore_errors=True)
+    months = data[PARTITION_COLUMNS].drop_duplicates()
+    for year, month in months.itertuples(index=False):
+        shutil.rmtree(partition_path(path, year, month), ignore_errors=True)
+    table = pa.Table.from_pandas(data, preserve_index=True)
+    pq.write_to_dataset(table, path, partition_cols=PARTITION_COLUMNS)
+    if key is not None:
+        with open(os.path.join(path, KEY_FILE), "w") as f:
+            f.write(key)
+
+
+def read_prepared(
+    path: str,
+    columns: Optional[List[str]] = None,
+    years: Optional[Iterable[int]] = None,
+    months: Optional[Iterable[int]] = None,
+) -> pd.DataFrame:
+    # only the partitions of the requested months are opened and only the
+    # requested columns are read from them, the files are memory mapped
+    filters = []
+    if years is not None:
+        filters.append(("year", "in", [int(y) for y in years]))
+    if months is not None:
+        filters.append(("month", "in", [int(m) for m in months]))
+    table = pq.read_table(
+        path,
+        columns=None if columns is None else stored_columns(path, columns),
+        filters=filters or None,
+        memory_map=True,
+        use_pandas_metadata=True,
+    )
+    data = table.to_pandas(split_blocks=True, self_destruct=True)
+    # partition values come back as categories, and partitions in directory
+    # order rather than in the order the rows were written
+    for c in PARTITION_COLUMNS:
+        if c in data.columns:
+            data[c] = data[c].astype(np.int64)
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+    return data
+
+
+def stored_columns(path: str, columns: List[str]) -> List[str]:
+    names = set(ds.dataset(path, format="parquet", partitioning="hive").schema.names)
+    missing = [c for c in columns if c not in names and f"{c}_cents" not in names]
+    if missing:
+        raise Exception(f"Columns {missing} are not in the store at {path}")
+    return [c if c in names else f"{c}_cents" for c in columns]
+
+
+def partition_path(path: str, year: int, month: int) -> str:
+    return os.path.join(path, f"year={year}", f"month={month}")
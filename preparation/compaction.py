@@ -0,0 +1,84 @@
+from typing import List
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_SCALE = 100
+AMOUNT_COLUMNS = ["Debit", "Credit"]
+CATEGORICAL_COLUMNS = [
+    "type",
+    "entity",
+    "Beneficiary / Originator",
+    "Payment Details",
+    "Currency",
+]
+CALENDAR_DTYPES = {
+    "day": np.int8,
+    "month": np.int8,
+    "year": np.int16,
+    "weekday": np.int8,
+    "week": np.int8,
+    "iso_year": np.int16,
+}
+
+
+def compact_data(data: pd.DataFrame) -> pd.DataFrame:
+    # amounts become integer cents in <column>_cents, use amount() or
+    # with_amounts() to read them back as floats
+    columns = {}
+    for c in data.columns:
+        values = data[c]
+        if c in AMOUNT_COLUMNS:
+            cents = np.round(values.to_numpy(dtype=np.float64) * AMOUNT_SCALE)
+            columns[f"{c}_cents"] = cents.astype(smallest_int_dtype(cents))
+        elif c in CATEGORICAL_COLUMNS:
+            columns[c] = values.astype("category")
+        elif c in CALENDAR_DTYPES:
+            columns[c] = (
+                values.astype(CALENDAR_DTYPES[c])
+                if not values.isna().any()
+                else values.astype(pd.Int16Dtype())
+            )
+        else:
+            columns[c] = values
+    compact = pd.DataFrame(columns, index=data.index)
+
+    savings = memory_savings(data, compact)
+    logger.info(
+        f"Compacted transactions from {savings['before'].sum()} to "
+        f"{savings['after'].sum()} bytes"
+    )
+    return compact
+
+
+def smallest_int_dtype(values: np.ndarray):
+    for dtype in [np.int32, np.int64]:
+        info = np.iinfo(dtype)
+        if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return dtype
+    return np.int64
+
+
+def amount(data: pd.DataFrame, column: str) -> pd.Series:
+    if column in data.columns:
+        return data[column]
+    return (data[f"{column}_cents"] / AMOUNT_SCALE).rename(column)
+
+
+def with_amounts(
+    data: pd.DataFrame, columns: List[str] = AMOUNT_COLUMNS
+) -> pd.DataFrame:
+    missing = {c: amount(data, c) for c in columns if c not in data.columns}
+    return data.assign(**missing) if missing else data
+
+
+def memory_savings(original: pd.DataFrame, compact: pd.DataFrame) -> pd.DataFrame:
+    before = original.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False).rename(
+        lambda c: c[: -len("_cents")] if c.endswith("_cents") else c
+    )
+    report = pd.DataFrame({"before": before, "after": after})
+    report["saved"] = report["before"] - report["after"]
+    return report
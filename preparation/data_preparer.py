@@ -1,27 +1,25 @@
+from typing import Dict, List, Optional
+import json
+import numpy as np
 import pandas as pd
 from preparation.rules_preparer import prepare_rules
-from preparation.types_classifier import assign_type, assign_entity
-from functools import partial
-
-
-def prepare_data(data: pd.DataFrame):
-    prepare_date_columns(data)
-    data['Debit'] = data['Debit'].fillna(0)
-    data['Credit'] = data['Credit'].fillna(0)
-    rules = prepare_rules()
-    f = partial(
-        assign_type,
-        types_mapping=rules,
-        info_columns=["Beneficiary / Originator", "Payment Details"],
-    )
-    data["type"] = data.apply(f, axis=1)
+from preparation.types_classifier import KeywordMatcher
+from preparation.classification_cache import ClassificationCache
+from instrumentation.recorder import set_counter, stage
 
-    f = partial(
-        assign_entity,
-        types_mapping=rules,
-        info_columns=["Beneficiary / Originator", "Payment Details"],
-    )
-    data["entity"] = data.apply(f, axis=1)
+INFO_COLUMNS = ["Beneficiary / Originator", "Payment Details"]
+
+
+def prepare_data(data: pd.DataFrame, cache: Optional[ClassificationCache] = None):
+    set_counter("rows", len(data))
+    with stage("prepare_dates"):
+        prepare_date_columns(data)
+    data["Debit"] = data["Debit"].fillna(0)
+    data["Credit"] = data["Credit"].fillna(0)
+    with stage("classification"):
+        data["type"], data["entity"] = classify_transactions(
+            data, prepare_rules(), INFO_COLUMNS, cache
+        )
 
 
 def prepare_date_columns(data: pd.DataFrame):
@@ -30,4 +28,60 @@ def prepare_date_columns(data: pd.DataFrame):
     data["month"] = data["Booking date"].dt.month
     data["year"] = data["Booking date"].dt.year
     data["weekday"] = data["Booking date"].dt.weekday
-    data["week"] = data["Booking date"].dt.isocalendar().week
+    iso = data["Booking date"].dt.isocalendar()
+    data["week"] = iso.week
+    # the year an ISO week belongs to, which differs from the calendar year
+    # for the days around new year
+    data["iso_year"] = iso.year
+
+
+def classify_transactions(
+    data: pd.DataFrame,
+    types_mapping: Dict[str, List[str]],
+    info_columns: List[str],
+    cache: Optional[ClassificationCache] = None,
+):
+    columns = [normalized_codes(data[c]) for c in info_columns]
+    codes = np.zeros(len(data), dtype=np.int64)
+    for column_codes, uniques in columns:
+        codes = codes * (len(uniques) + 1) + column_codes + 1
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    distinct = pd.DataFrame(
+        {
+            c: np.append(uniques, np.nan)[column_codes[first]]
+            for c, (column_codes, uniques) in zip(info_columns, columns)
+        }
+    )
+
+    keys = [
+        json.dumps([None if pd.isna(v) else v for v in row])
+        for row in distinct.itertuples(index=False)
+    ]
+    known = cache.lookup(keys) if cache is not None else {}
+    missing = [i for i, key in enumerate(keys) if key not in known]
+    set_counter("classification_keys", len(keys))
+    set_counter("classification_cache_misses", len(missing))
+    if missing:
+        types, entities = KeywordMatcher(types_mapping).classify(
+            distinct.iloc[missing], info_columns
+        )
+        classified = {keys[i]: (t, e) for i, t, e in zip(missing, types, entities)}
+        if cache is not None:
+            cache.store(classified)
+        known.update(classified)
+
+    types = np.array([known[key][0] for key in keys], dtype=object)
+    entities = np.array([known[key][1] for key in keys], dtype=object)
+    return (
+        pd.Series(types[inverse], index=data.index, name="type"),
+        pd.Series(entities[inverse], index=data.index, name="entity"),
+    )
+
+
+def normalized_codes(values: pd.Series):
+    # matching is case insensitive, so values are told apart by lower case
+    codes, uniques = pd.factorize(values)
+    lowered_codes, lowered = pd.factorize(
+        np.array([u.lower() for u in uniques], dtype=object)
+    )
+    return np.append(lowered_codes, -1)[codes], lowered.astype(object)
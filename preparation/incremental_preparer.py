@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from preparation.data_preparer import prepare_data
+from preparation.classification_cache import ClassificationCache
+from preparation.stream_preparer import add_to_aggregates
+
+DEFAULT_GROUPINGS = {
+    "monthly": ["year", "month"],
+    "weekly": ["iso_year", "week", "type"],
+}
+
+
+class IncrementalPreparer:
+    def __init__(
+        self,
+        data: Optional[pd.DataFrame] = None,
+        groupings: Dict[str, List[str]] = DEFAULT_GROUPINGS,
+        columns: Tuple[str, ...] = ("Debit", "Credit"),
+        cache: Optional[ClassificationCache] = None,
+    ):
+        # data has to be prepared already, appended rows are prepared here
+        self.groupings = groupings
+        self.columns = columns
+        self.cache = cache
+        self.parts = []
+        self.aggregates = {}
+        self.next_label = 0
+        self._data = None
+        if data is not None:
+            self.add_prepared(data)
+
+    def append(self, new_rows: pd.DataFrame) -> pd.DataFrame:
+        new_rows = new_rows.set_axis(
+            pd.RangeIndex(self.next_label, self.next_label + len(new_rows))
+        )
+        prepare_data(new_rows, self.cache)
+        self.add_prepared(new_rows)
+        return new_rows
+
+    def add_prepared(self, prepared: pd.DataFrame):
+        if len(prepared) == 0:
+            return
+        self.parts.append(prepared)
+        self.next_label = max(self.next_label, int(prepared.index.max()) + 1)
+        self.aggregates = add_to_aggregates(
+            self.aggregates, prepared, self.groupings, self.columns
+        )
+        self._data = None
+
+    @property
+    def data(self) -> pd.DataFrame:
+        # appended parts are only concatenated when the full frame is needed
+        if self._data is None:
+            self._data = pd.concat(self.parts) if self.parts else pd.DataFrame()
+            self.parts = [self._data] if self.parts else []
+        return self._data
+
+    def balance(self, year: int) -> pd.DataFrame:
+        balance = self.aggregates["monthly"].loc[year].reset_index()
+        balance["balance"] = balance["Credit"] + balance["Debit"]
+        balance["color"] = np.where(balance["balance"] < 0, "Negative", "Positive")
+        balance["savings"] = balance["balance"].cumsum()
+        return balance
+
+    def week_grocery_spending(self, year: int) -> Dict[int, float]:
+        weekly = self.aggregates["weekly"]
+        grocery = weekly[
+            (weekly.index.get_level_values("iso_year") == year)
+            & (weekly.index.get_level_values("type") == "grocery")
+        ]
+        return dict(
+            zip(
+                grocery.index.get_level_values("week").tolist(),
+                grocery["Debit"].abs().tolist(),
+            )
+        )
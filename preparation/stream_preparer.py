@@ -0,0 +1,44 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+from preparation.data_preparer import prepare_data
+from preparation.classification_cache import ClassificationCache
+
+
+def read_prepared_chunks(
+    path: str,
+    chunksize: int = 100000,
+    cache: Optional[ClassificationCache] = None,
+    **read_csv_kwargs,
+) -> Iterator[pd.DataFrame]:
+    # row labels keep counting across chunks, so chunks can be concatenated
+    # or joined with solutions like one prepared frame
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+        prepare_data(chunk, cache)
+        yield chunk
+
+
+def aggregate_chunks(
+    chunks: Iterable[pd.DataFrame],
+    groupings: Dict[str, List[str]],
+    columns: Tuple[str, ...] = ("Debit", "Credit"),
+) -> Dict[str, pd.DataFrame]:
+    # only the per group sums are kept between chunks
+    totals = {}
+    for chunk in chunks:
+        totals = add_to_aggregates(totals, chunk, groupings, columns)
+    return totals
+
+
+def add_to_aggregates(
+    totals: Dict[str, pd.DataFrame],
+    data: pd.DataFrame,
+    groupings: Dict[str, List[str]],
+    columns: Tuple[str, ...] = ("Debit", "Credit"),
+) -> Dict[str, pd.DataFrame]:
+    updated = dict(totals)
+    for name, by in groupings.items():
+        part = data.groupby(by)[list(columns)].sum()
+        updated[name] = (
+            part if name not in totals else totals[name].add(part, fill_value=0)
+        ).sort_index()
+    return updated
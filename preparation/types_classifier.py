@@ -1,4 +1,6 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
+import re
+import numpy as np
 import pandas as pd
 
 
@@ -34,3 +36,53 @@ def assign_entity(row, types_mapping: Dict[str, List[str]], info_columns: List[s
     matched_entity.append("unknown_entity")
 
     return matched_entity[0]
+
+
+class KeywordMatcher:
+    def __init__(
+        self,
+        types_mapping: Dict[str, List[str]],
+        unknown_type: str = "unknown",
+        unknown_entity: str = "unknown_entity",
+    ):
+        # every (type, keyword) pair gets a rank in dict order, the lowest
+        # ranked keyword found in a text decides both its type and entity
+        keywords = [(s, xs) for s in types_mapping for xs in types_mapping[s]]
+        self.rank = {}
+        for i, (_, xs) in enumerate(keywords):
+            self.rank.setdefault(xs, i)
+        self.types = np.array([s for s, _ in keywords] + [unknown_type], dtype=object)
+        self.entities = np.array(
+            [xs for _, xs in keywords] + [unknown_entity], dtype=object
+        )
+        # the lookahead reports the best ranked keyword starting at every
+        # position, so overlapping keywords are not lost
+        alternatives = sorted(self.rank, key=self.rank.get)
+        self.pattern = (
+            re.compile("(?=(" + "|".join(re.escape(xs) for xs in alternatives) + "))")
+            if alternatives
+            else None
+        )
+
+    def match(self, text: str) -> int:
+        if self.pattern is None:
+            return -1
+        found = [self.rank[m.group(1)] for m in self.pattern.finditer(text.lower())]
+        return min(found) if found else -1
+
+    def match_column(self, values: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(values)
+        matched = np.array([self.match(u) for u in uniques] + [-1], dtype=np.int64)
+        # missing values get code -1 and pick up the trailing no-match
+        return matched[codes]
+
+    def classify(
+        self, data: pd.DataFrame, info_columns: List[str]
+    ) -> Tuple[pd.Series, pd.Series]:
+        matched = np.full(len(data), -1, dtype=np.int64)
+        for c in info_columns:
+            matched = np.where(matched >= 0, matched, self.match_column(data[c]))
+        return (
+            pd.Series(self.types[matched], index=data.index, name="type"),
+            pd.Series(self.entities[matched], index=data.index, name="entity"),
+        )
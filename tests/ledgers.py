@@ -0,0 +1,60 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+import pulp
+from model.model_creator import create_model
+from model.model_solver import solve_model
+from model.solution_parser import parse_solution
+
+TYPES = ["grocery", "fashion", "shopping", "travel", "rent", "unknown", "income"]
+TYPE_PROBABILITIES = [0.4, 0.1, 0.15, 0.05, 0.05, 0.15, 0.1]
+# few distinct amounts, so ledgers contain identical transactions
+AMOUNTS = [5.0, 12.5, 20.0, 35.0, 60.0, 120.0]
+RENT = 800.0
+
+
+def make_ledger(rows: int, seed: int, weeks: int = 4) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    types = rng.choice(TYPES, rows, p=TYPE_PROBABILITIES)
+    amounts = np.where(types == "rent", RENT, rng.choice(AMOUNTS, rows))
+    income = types == "income"
+    return pd.DataFrame(
+        {
+            "Debit": np.where(income, 0.0, -amounts),
+            "Credit": np.where(income, amounts * 10, 0.0),
+            "type": types,
+            "entity": [f"{t}_{e}" for t, e in zip(types, rng.integers(0, 2, rows))],
+            "importance": np.select(
+                [types == "rent", income], [1000, 0], rng.integers(1, 6, rows)
+            ),
+            "week": rng.integers(1, weeks + 1, rows),
+            "iso_year": 2019,
+        },
+        index=pd.RangeIndex(100, 100 + rows),
+    )
+
+
+def reference_objective(
+    data: pd.DataFrame, savings: float, grocery_per_week: float
+) -> Optional[float]:
+    # CBC on the plain model, None when it is infeasible
+    model, decision_vars = create_model(data, savings, grocery_per_week)
+    solve_model(model)
+    if model.status == pulp.LpStatusInfeasible:
+        return None
+    assert model.status == pulp.LpStatusOptimal
+    return parse_solution(data, decision_vars, model)[1]
+
+
+def assert_feasible(
+    data: pd.DataFrame, solution: pd.Series, savings: float, grocery_per_week: float
+):
+    expense = data["Debit"].abs()
+    assert solution.index.equals(data.index)
+    assert set(solution.unique()) <= {0, 1}
+    assert (expense * solution).sum() <= (1 - savings) * expense.sum() + 1e-6
+    assert (solution[data["type"] == "rent"] == 1).all()
+    grocery = data["type"] == "grocery"
+    for _, week in data[grocery].groupby(["iso_year", "week"]):
+        floor = min(expense[week.index].sum(), grocery_per_week)
+        assert (expense[week.index] * solution[week.index]).sum() >= floor - 1e-6
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+import model.knapsack_solver as knapsack_solver
+from model.knapsack_solver import solve_knapsack
+from tests.ledgers import assert_feasible, make_ledger, reference_objective
+
+SETTINGS = [
+    (0.0, 0.0),
+    (0.1, 30.0),
+    (0.2, 60.0),
+    (0.3, 20.0),
+    (0.45, 50.0),
+    (0.9, 50.0),
+]
+
+
+@pytest.mark.parametrize("seed", range(12))
+@pytest.mark.parametrize("savings, grocery_per_week", SETTINGS)
+def test_matches_cbc_on_random_ledgers(seed, savings, grocery_per_week):
+    data = make_ledger(40, seed)
+    expected = reference_objective(data, savings, grocery_per_week)
+    if expected is None:
+        with pytest.raises(Exception, match="Cannot parse solution"):
+            solve_knapsack(data, savings, grocery_per_week)
+        return
+
+    solution, objective = solve_knapsack(data, savings, grocery_per_week)
+
+    assert objective == pytest.approx(expected)
+    assert (solution * data["importance"]).sum() == pytest.approx(objective)
+    assert_feasible(data, solution, savings, grocery_per_week)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_cbc_fallback_above_core_size(monkeypatch, seed):
+    # every core is too large to search, so the solve goes to CBC
+    monkeypatch.setattr(knapsack_solver, "MAX_CORE_SIZE", 0)
+    data = make_ledger(60, seed)
+
+    solution, objective = solve_knapsack(data, 0.3, 40.0)
+
+    assert objective == pytest.approx(reference_objective(data, 0.3, 40.0))
+    assert_feasible(data, solution, 0.3, 40.0)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_node_limit_keeps_the_optimum(seed):
+    data = make_ledger(60, seed)
+
+    solution, objective = solve_knapsack(data, 0.3, 40.0, node_limit=1)
+
+    assert objective == pytest.approx(reference_objective(data, 0.3, 40.0))
+    assert_feasible(data, solution, 0.3, 40.0)
+
+
+def test_infeasible_grocery_floors():
+    data = make_ledger(40, 0)
+    assert reference_objective(data, 0.99, 100.0) is None
+
+    with pytest.raises(Exception, match="Cannot parse solution"):
+        solve_knapsack(data, 0.99, 100.0)
+
+
+def test_all_transactions_fixed():
+    # rent is forced in and income costs nothing, no transaction is left
+    data = pd.DataFrame(
+        {
+            "Debit": [-800.0, 0.0, -800.0],
+            "Credit": [0.0, 3000.0, 0.0],
+            "type": ["rent", "income", "rent"],
+            "entity": ["landlord", "salary", "landlord"],
+            "importance": [1000, 0, 1000],
+            "week": [1, 1, 5],
+            "iso_year": 2019,
+        }
+    )
+
+    solution, objective = solve_knapsack(data, 0.0, 50.0)
+
+    assert objective == reference_objective(data, 0.0, 50.0) == 2000
+    assert solution.tolist() == [1, 1, 1]
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pulp
+import pytest
+from model.model_creator import create_model
+from model.model_inputs import extract_model_inputs, group_identical_transactions
+from model.model_solver import solve_model
+from model.solution_parser import parse_solution
+from tests.ledgers import assert_feasible, make_ledger, reference_objective
+
+SETTINGS = [
+    (0.0, 0.0),
+    (0.1, 30.0),
+    (0.2, 60.0),
+    (0.3, 20.0),
+    (0.45, 50.0),
+    (0.9, 50.0),
+]
+
+
+@pytest.mark.parametrize("presolve", [False, True])
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("savings, grocery_per_week", SETTINGS)
+def test_aggregated_model_keeps_the_optimum(presolve, seed, savings, grocery_per_week):
+    data = make_ledger(60, seed)
+    expected = reference_objective(data, savings, grocery_per_week)
+    model, decision_vars = create_model(
+        data, savings, grocery_per_week, presolve=presolve, aggregate=True
+    )
+    solve_model(model)
+
+    if expected is None:
+        assert model.status == pulp.LpStatusInfeasible
+        return
+    solution, objective = parse_solution(data, decision_vars, model)
+    assert objective == pytest.approx(expected)
+    assert (solution * data["importance"]).sum() == pytest.approx(objective)
+    assert_feasible(data, solution, savings, grocery_per_week)
+
+
+def test_identical_transactions_share_a_group():
+    data = pd.DataFrame(
+        {
+            "Debit": [-10.0, -10.0, -10.0, -12.0, -10.0, -10.0],
+            "type": ["grocery"] * 6,
+            "entity": ["lidl", "lidl", "lidl", "lidl", "aldi", "lidl"],
+            "importance": [1, 1, 1, 1, 1, 2],
+            "week": [1, 1, 2, 1, 1, 1],
+            "iso_year": 2019,
+        }
+    )
+    inputs = extract_model_inputs(data)
+
+    groups = group_identical_transactions(data, inputs, np.ones(len(data), dtype=bool))
+
+    # only the first two match in week, amount, entity and importance
+    assert groups[0] == groups[1]
+    assert len(set(groups[1:])) == 5
+
+
+def test_fixed_transactions_stay_on_their_own():
+    data = pd.DataFrame(
+        {
+            "Debit": [-10.0] * 4,
+            "type": ["shopping"] * 4,
+            "entity": ["amazon"] * 4,
+            "importance": [3] * 4,
+            "week": [1] * 4,
+            "iso_year": 2019,
+        }
+    )
+    inputs = extract_model_inputs(data)
+
+    groups = group_identical_transactions(
+        data, inputs, np.array([True, False, True, False])
+    )
+
+    assert groups[0] == groups[2]
+    assert len({groups[0], groups[1], groups[3]}) == 3
+
+
+def test_kept_count_goes_to_the_first_transactions():
+    # a budget of 25 keeps two of the three identical transactions
+    data = pd.DataFrame(
+        {
+            "Debit": [-10.0] * 3,
+            "type": ["shopping"] * 3,
+            "entity": ["amazon"] * 3,
+            "importance": [3] * 3,
+            "week": [1] * 3,
+            "iso_year": 2019,
+        },
+        index=[7, 3, 5],
+    )
+    model, decision_vars = create_model(data, 1 - 25 / 30, 0.0, aggregate=True)
+    solve_model(model)
+
+    solution, objective = parse_solution(data, decision_vars, model)
+
+    assert len(model.variables()) == 1
+    assert objective == 6
+    assert solution.tolist() == [1, 1, 0]
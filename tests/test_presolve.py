@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pulp
+import pytest
+from model.model_creator import create_model
+from model.model_inputs import extract_model_inputs, group_grocery_by_week
+from model.model_solver import solve_model
+from model.presolve import PresolveResult, presolve_model
+from model.solution_parser import parse_solution
+from tests.ledgers import assert_feasible, make_ledger, reference_objective
+
+SETTINGS = [
+    (0.0, 0.0),
+    (0.1, 30.0),
+    (0.2, 60.0),
+    (0.3, 20.0),
+    (0.45, 50.0),
+    (0.9, 50.0),
+]
+
+
+def presolve(data: pd.DataFrame, savings: float, grocery_per_week: float):
+    inputs = extract_model_inputs(data)
+    floors = {
+        w: (positions, min(inputs.expense[positions].sum(), grocery_per_week))
+        for w, positions in group_grocery_by_week(inputs).items()
+    }
+    return presolve_model(inputs, (1 - savings) * inputs.expense.sum(), floors)
+
+
+def solve_presolved(data: pd.DataFrame, savings: float, grocery_per_week: float):
+    model, decision_vars = create_model(data, savings, grocery_per_week, presolve=True)
+    solve_model(model)
+    if model.status == pulp.LpStatusInfeasible:
+        return None, None
+    return parse_solution(data, decision_vars, model)
+
+
+def expenses(rows) -> pd.DataFrame:
+    return pd.DataFrame(
+        [(-cost, t, t, importance, week) for cost, t, importance, week in rows],
+        columns=["Debit", "type", "entity", "importance", "week"],
+    ).assign(Credit=0.0, iso_year=2019)
+
+
+@pytest.mark.parametrize("seed", range(12))
+@pytest.mark.parametrize("savings, grocery_per_week", SETTINGS)
+def test_presolve_keeps_the_optimum(seed, savings, grocery_per_week):
+    data = make_ledger(40, seed)
+    expected = reference_objective(data, savings, grocery_per_week)
+
+    solution, objective = solve_presolved(data, savings, grocery_per_week)
+
+    if expected is None:
+        assert solution is None
+        return
+    assert objective == pytest.approx(expected)
+    assert_feasible(data, solution, savings, grocery_per_week)
+
+
+def test_floors_that_need_every_grocery_fix_them_and_are_removed():
+    data = expenses(
+        [
+            (30.0, "grocery", 1, 1),
+            (20.0, "grocery", 1, 1),
+            (10.0, "grocery", 1, 2),
+            (25.0, "grocery", 1, 2),
+            (200.0, "travel", 9, 1),
+        ]
+    )
+
+    result = presolve(data, 0.5, 50.0)
+
+    # neither week spends more than the floor of 50, so all of it is needed
+    assert result.fixed[:4].tolist() == [1, 1, 1, 1]
+    assert result.grocery_floors == {}
+    assert result.budget == pytest.approx(0.5 * 285.0 - 85.0)
+    assert solve_presolved(data, 0.5, 50.0)[1] == reference_objective(data, 0.5, 50.0)
+
+
+def test_transactions_over_the_budget_are_dropped():
+    data = expenses(
+        [(800.0, "rent", 1000, 1), (150.0, "travel", 9, 1), (40.0, "shopping", 2, 1)]
+    )
+
+    result = presolve(data, 0.1, 0.0)
+
+    # 891 of budget, 800 of it for the rent
+    assert result.fixed.tolist() == [1, 0, -1]
+    assert solve_presolved(data, 0.1, 0.0)[1] == reference_objective(data, 0.1, 0.0)
+
+
+def test_dominated_transactions_are_dropped():
+    # two plans of 10 at importance 5 fill the budget of 20, the plan of 15
+    # at importance 4 would need both of them as well
+    data = expenses(
+        [
+            (10.0, "shopping", 5, 1),
+            (10.0, "shopping", 5, 1),
+            (15.0, "fashion", 4, 1),
+            (65.0, "travel", -1, 1),
+        ]
+    )
+
+    result = presolve(data, 0.8, 0.0)
+
+    assert result.fixed[2] == 0
+    assert result.fixed[3] == 0
+    assert solve_presolved(data, 0.8, 0.0)[1] == reference_objective(data, 0.8, 0.0)
+
+
+def test_every_transaction_fixed():
+    data = expenses([(800.0, "rent", 1000, 1), (30.0, "grocery", 1, 1)])
+
+    result = presolve(data, 0.0, 50.0)
+
+    assert isinstance(result, PresolveResult)
+    assert np.all(result.fixed >= 0)
+    assert solve_presolved(data, 0.0, 50.0)[1] == 1001.0
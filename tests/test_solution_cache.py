@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import pulp
+import pytest
+import model.solution_cache as solution_cache
+from model.model_solver import FEASIBLE_STATUS
+from model.solution_cache import CachedSolution, SolutionCache, solve_warm
+from tests.ledgers import assert_feasible, make_ledger, reference_objective
+
+INFEASIBLE = pulp.LpStatus[pulp.LpStatusInfeasible]
+LOOSE = [(0.3, 20.0), (0.6, 50.0), (0.9, 50.0)]
+TIGHT = [(0.3, 20.0), (0.45, 30.0), (0.6, 60.0), (0.9, 50.0), (0.99, 100.0)]
+
+
+def count_solves(monkeypatch) -> list:
+    calls = []
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return solve_warm(*args, **kwargs)
+
+    monkeypatch.setattr(solution_cache, "solve_warm", counted)
+    return calls
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("savings, grocery_per_week", LOOSE)
+def test_infeasible_tighter_settings_match_a_solve(
+    monkeypatch, seed, savings, grocery_per_week
+):
+    data = make_ledger(40, seed)
+    cache = SolutionCache()
+    infeasible = cache.solve(data, savings, grocery_per_week).status == INFEASIBLE
+    calls = count_solves(monkeypatch)
+
+    for s, g in TIGHT:
+        if s < savings or g < grocery_per_week or (s, g) == (savings, grocery_per_week):
+            continue
+        cached = cache.lookup(data, s, g)
+        # only infeasibility carries over to another setting
+        if not infeasible:
+            assert cached is None
+            continue
+        assert cached.status == INFEASIBLE and cached.proven
+        assert cached.solution is None
+        assert reference_objective(data, s, g) is None
+    assert calls == []
+
+
+def test_infeasible_result_answers_tighter_settings_without_solving(monkeypatch):
+    data = make_ledger(40, 0)
+    cache = SolutionCache()
+    assert cache.solve(data, 0.99, 100.0).status == INFEASIBLE
+    calls = count_solves(monkeypatch)
+
+    result = cache.solve(data, 0.995, 120.0)
+
+    assert calls == []
+    assert result.status == INFEASIBLE and result.proven
+    assert np.isnan(result.objective)
+    # a looser setting is still solved
+    assert cache.lookup(data, 0.99, 50.0) is None
+
+
+def test_infeasible_result_of_other_data_is_not_used():
+    cache = SolutionCache()
+    cache.solve(make_ledger(40, 0), 0.99, 100.0)
+
+    assert cache.lookup(make_ledger(40, 1), 0.995, 120.0) is None
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_warm_start_is_the_best_plan_of_a_tighter_setting(seed):
+    data = make_ledger(40, seed)
+    cache = SolutionCache()
+    tight = cache.solve(data, 0.6, 50.0)
+    tighter = cache.solve(data, 0.8, 50.0)
+    cache.solve(data, 0.1, 10.0)
+
+    warm = cache.warm_start(data, 0.3, 20.0)
+
+    plans = [r for r in (tight, tighter) if r.solution is not None]
+    if not plans:
+        assert warm is None
+        return
+    best = max(plans, key=lambda r: r.objective)
+    assert warm.tolist() == best.solution.tolist()
+    # the starting plan is feasible at the looser setting
+    assert_feasible(data, warm, 0.3, 20.0)
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("savings, grocery_per_week", [(0.2, 30.0), (0.45, 50.0)])
+def test_warm_solve_keeps_the_optimum(seed, savings, grocery_per_week):
+    data = make_ledger(40, seed)
+    expected = reference_objective(data, savings, grocery_per_week)
+    cache = SolutionCache()
+    cache.solve(data, savings + 0.3, grocery_per_week)
+    warm = cache.warm_start(data, savings, grocery_per_week)
+
+    result = solve_warm(data, savings, grocery_per_week, warm)
+
+    if expected is None:
+        assert result.status == INFEASIBLE
+        return
+    assert result.proven
+    assert result.objective == pytest.approx(expected)
+    assert result.objective == pytest.approx(
+        solve_warm(data, savings, grocery_per_week).objective
+    )
+    assert_feasible(data, result.solution, savings, grocery_per_week)
+
+
+def test_unproven_plan_is_only_a_warm_start(monkeypatch):
+    data = make_ledger(40, 2)
+    plan = pd.Series(0, index=data.index, name="solution")
+    plan[data["type"] == "rent"] = 1
+    cache = SolutionCache()
+    cache.store(data, 0.3, 20.0, CachedSolution("Feasible", plan, 1.0, False))
+    calls = count_solves(monkeypatch)
+
+    assert cache.lookup(data, 0.3, 20.0) is None
+    result = cache.solve(data, 0.3, 20.0)
+
+    # the stored plan went to the solver and the proven one replaced it
+    assert calls[0][3].tolist() == plan.tolist()
+    assert result.proven
+    assert result.objective == pytest.approx(reference_objective(data, 0.3, 20.0))
+    assert cache.lookup(data, 0.3, 20.0).objective == result.objective
+
+
+def test_plan_stopped_on_the_gap_is_only_a_warm_start():
+    # CBC stops this one on the gap rather than proving the optimum
+    data = make_ledger(40, 0)
+
+    result = solve_warm(data, 0.3, 20.0, gap=0.5)
+
+    assert result.status == FEASIBLE_STATUS and not result.proven
+    cache = SolutionCache()
+    cache.store(data, 0.3, 20.0, result)
+    assert cache.lookup(data, 0.3, 20.0) is None
+    assert cache.warm_start(data, 0.3, 20.0).tolist() == result.solution.tolist()
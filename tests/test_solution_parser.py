@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pulp
+from model.model_creator import create_model
+from model.model_solver import solve_model
+from model.solution_parser import parse_solution
+
+
+def ledger(importance):
+    return pd.DataFrame(
+        {
+            "Debit": [-500.0, -30.0, -20.0, -400.0],
+            "type": ["rent", "grocery", "grocery", "travel"],
+            "importance": importance,
+            "week": [1, 1, 1, 1],
+            "iso_year": [2019, 2019, 2019, 2019],
+        }
+    )
+
+
+def test_objective_of_fully_presolved_model():
+    # rent is kept, the grocery floor needs both groceries and the travel
+    # does not fit in the budget, so no variable is left to the solver
+    data = ledger([1000, 1, 1, 10])
+    model, decision_vars = create_model(data, 0.3, 100.0, presolve=True)
+    assert model.objective.constant == 1002.0
+    assert not list(model.objective.keys())
+    solve_model(model)
+    assert model.status == pulp.LpStatusOptimal
+
+    solution, objective = parse_solution(data, decision_vars, model)
+
+    assert objective == 1002.0
+    assert solution.tolist() == [1, 1, 1, 0]
+
+
+def test_objective_without_important_transactions():
+    data = ledger([0, 0, 0, 0])
+    model, decision_vars = create_model(data, 0.3, 0.0)
+    solve_model(model)
+
+    _, objective = parse_solution(data, decision_vars, model)
+
+    assert objective == 0
+    assert not np.isnan(objective)
@@ -1,25 +1,47 @@
-import plotly.express as px
+from __future__ import annotations
 import pandas as pd
 import numpy as np
+from typing import List
+from visualization.figure_utils import lazy_import, show_figures
+from preparation.compaction import with_amounts
 
+go = lazy_import("plotly.graph_objects")
+px = lazy_import("plotly.express")
 
-def visualize_data(transactions: pd.DataFrame, year=2019):
+AGGREGATION_KEYS = ["month", "week", "type", "entity"]
+AMOUNT_COLUMNS = ["Debit", "Credit", "expense"]
+
+
+def visualize_data(
+    transactions: pd.DataFrame, year=2019, show: bool = True
+) -> List[go.Figure]:
+    transactions = with_amounts(transactions)
     verify_data(transactions)
-    transactions["expense"] = abs(transactions["Debit"])
 
-    selected_year = transactions[transactions["year"] == year].copy()
+    # every chart shows at most type x entity x month x week buckets, so the
+    # year is reduced to that grain once instead of plotting each transaction
+    selected_year = aggregate_transactions(
+        transactions.loc[
+            transactions["year"] == year, AGGREGATION_KEYS + ["Debit", "Credit"]
+        ]
+    )
 
-    balance = selected_year.groupby(["month"]).sum().reset_index()
+    balance = (
+        selected_year.groupby(["month"], observed=True)[AMOUNT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
     balance["balance"] = balance["Credit"] + balance["Debit"]
     balance["color"] = np.where(balance["balance"] < 0, "Negative", "Positive")
     balance["savings"] = balance["balance"].cumsum()
     grouped_week = (
         selected_year[selected_year["type"] == "grocery"]
-        .groupby(["week"])
+        .groupby(["week"], observed=True)[AMOUNT_COLUMNS]
         .sum()
         .reset_index()
     )
 
+    figures = []
     fig = px.pie(
         selected_year,
         values="expense",
@@ -27,7 +49,7 @@ def visualize_data(transactions: pd.DataFrame, year=2019):
         title=f"Ratio of expenses by type in year {year}",
         hole=0.3,
     )
-    fig.show()
+    figures.append(fig)
 
     fig = px.sunburst(
         selected_year,
@@ -37,7 +59,7 @@ def visualize_data(transactions: pd.DataFrame, year=2019):
     )
     fig.update_traces(textinfo="label+percent entry")
 
-    fig.show()
+    figures.append(fig)
 
     fig = px.bar(
         balance,
@@ -49,7 +71,7 @@ def visualize_data(transactions: pd.DataFrame, year=2019):
         title=f"Monthly balance in year {year}",
         height=400,
     )
-    fig.show()
+    figures.append(fig)
 
     fig = px.bar(
         balance,
@@ -60,9 +82,14 @@ def visualize_data(transactions: pd.DataFrame, year=2019):
         barmode="group",
         height=400,
     )
-    fig.show()
+    figures.append(fig)
 
-    grouped_month_type = selected_year.groupby(["month", "type"]).sum().reset_index()
+    grouped_month_type = (
+        selected_year.groupby(["month", "type"], observed=True)[AMOUNT_COLUMNS]
+        .sum()
+        .sort_index()
+        .reset_index()
+    )
 
     fig = px.bar(
         grouped_month_type,
@@ -78,7 +105,7 @@ def visualize_data(transactions: pd.DataFrame, year=2019):
         title=f"Total Expenses by month and type in year {year}",
         height=400,
     )
-    fig.show()
+    figures.append(fig)
 
     fig = px.bar(
         grouped_week,
@@ -88,7 +115,7 @@ def visualize_data(transactions: pd.DataFrame, year=2019):
         color_discrete_sequence=["orange"],
         title=f"Grocery expenses by calendar week for year {year}",
     )
-    fig.show()
+    figures.append(fig)
     fig = px.area(
         balance,
         x="month",
@@ -97,7 +124,19 @@ def visualize_data(transactions: pd.DataFrame, year=2019):
         color_discrete_sequence=["green"],
         title=f"Savings trend for year {year}",
     )
-    fig.show()
+    figures.append(fig)
+    return show_figures(figures, show)
+
+
+def aggregate_transactions(transactions: pd.DataFrame) -> pd.DataFrame:
+    # observed groups of categorical keys are not sorted, hence sort_index
+    return (
+        transactions.assign(expense=transactions["Debit"].abs())
+        .groupby(AGGREGATION_KEYS, dropna=False, observed=True)[AMOUNT_COLUMNS]
+        .sum()
+        .sort_index()
+        .reset_index()
+    )
 
 
 def verify_data(transactions: pd.DataFrame):
@@ -0,0 +1,31 @@
+from __future__ import annotations
+from types import ModuleType
+from typing import List
+import importlib.util
+import sys
+
+
+def lazy_import(name: str) -> ModuleType:
+    # the module is only executed on first attribute access, so headless
+    # runs that import a visualizer for its aggregations skip it
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+go = lazy_import("plotly.graph_objects")
+
+
+def show_figures(figures: List[go.Figure], show: bool = True) -> List[go.Figure]:
+    if show:
+        for fig in figures:
+            fig.show()
+    return figures
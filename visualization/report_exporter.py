@@ -0,0 +1,124 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Mapping, Optional
+import os
+import re
+import pandas as pd
+from visualization.figure_utils import lazy_import
+from visualization.solution_data_visualizer import (
+    visualize_solution_data,
+    plot_solution_preview,
+)
+
+go = lazy_import("plotly.graph_objects")
+pio = lazy_import("plotly.io")
+offline = lazy_import("plotly.offline")
+
+FORMATS = ["html", "json"]
+PLOTLYJS_FILE = "plotly.min.js"
+
+
+def export_figures(
+    figures: List[go.Figure],
+    directory: str,
+    format: str = "html",
+    processes: Optional[int] = None,
+) -> List[str]:
+    plotlyjs = prepare_export(directory, format)
+    paths = figure_paths(figures, directory, format)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(
+            executor.map(
+                write_figure,
+                figures,
+                paths,
+                [relative_bundle(plotlyjs, directory)] * len(figures),
+            )
+        )
+
+
+def export_account_reports(
+    solved_accounts: Mapping[Any, pd.DataFrame],
+    directory: str,
+    grocery_threshold=None,
+    format: str = "html",
+    processes: Optional[int] = None,
+) -> pd.DataFrame:
+    # figures are built and written next to each other in the workers, one
+    # subdirectory per account, and every html report loads the same
+    # plotly.js bundle from the top directory
+    plotlyjs = prepare_export(directory, format)
+    accounts = list(solved_accounts)
+    directories = [os.path.join(directory, str(account)) for account in accounts]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        paths = list(
+            executor.map(
+                write_account_report,
+                [solved_accounts[account] for account in accounts],
+                directories,
+                [grocery_threshold] * len(accounts),
+                [format] * len(accounts),
+                [relative_bundle(plotlyjs, d) for d in directories],
+            )
+        )
+    return pd.DataFrame(
+        [
+            (account, path)
+            for account, report in zip(accounts, paths)
+            for path in report
+        ],
+        columns=["account", "path"],
+    )
+
+
+def write_account_report(
+    solved_data: pd.DataFrame,
+    directory: str,
+    grocery_threshold,
+    format: str,
+    plotlyjs: Optional[str],
+) -> List[str]:
+    figures = [
+        plot_solution_preview(solved_data, show=False)
+    ] + visualize_solution_data(solved_data, grocery_threshold, show=False)
+    return [
+        write_figure(fig, path, plotlyjs)
+        for fig, path in zip(figures, figure_paths(figures, directory, format))
+    ]
+
+
+def prepare_export(directory: str, format: str) -> Optional[str]:
+    if format not in FORMATS:
+        raise Exception(f"Unknown report format {format}, expected one of {FORMATS}")
+    os.makedirs(directory, exist_ok=True)
+    if format != "html":
+        return None
+    bundle = os.path.join(directory, PLOTLYJS_FILE)
+    with open(bundle, "w", encoding="utf-8") as f:
+        f.write(offline.get_plotlyjs())
+    return bundle
+
+
+def relative_bundle(bundle: Optional[str], directory: str) -> Optional[str]:
+    return os.path.relpath(bundle, directory) if bundle is not None else None
+
+
+def figure_paths(figures: List[go.Figure], directory: str, format: str) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    return [
+        os.path.join(directory, f"{i:02d}_{figure_name(fig)}.{format}")
+        for i, fig in enumerate(figures)
+    ]
+
+
+def write_figure(fig: go.Figure, path: str, plotlyjs: Optional[str]) -> str:
+    if path.endswith(".html"):
+        fig.write_html(path, include_plotlyjs=plotlyjs, full_html=True)
+    else:
+        pio.write_json(fig, path)
+    return path
+
+
+def figure_name(fig: go.Figure) -> str:
+    title = fig.layout.title.text or "figure"
+    return re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")
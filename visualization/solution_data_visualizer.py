@@ -1,35 +1,105 @@
+from __future__ import annotations
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.express as px
 import numpy as np
+from typing import List
+from preparation.compaction import amount
+from visualization.figure_utils import lazy_import, show_figures
 
+go = lazy_import("plotly.graph_objects")
+px = lazy_import("plotly.express")
+subplots = lazy_import("plotly.subplots")
 
-def visualize_solution_data(solved_data: pd.DataFrame, grocery_threshold=None):
+DATA_TYPES = ["original", "optimized"]
+CUBE_KEYS = ["month", "week", "type", "entity"]
+CUBE_COLUMNS = ["Debit", "Credit", "expense"]
+
+
+def visualize_solution_data(
+    solved_data: pd.DataFrame, grocery_threshold=None, show: bool = True
+) -> List[go.Figure]:
     assert "solution" in solved_data.columns, "Dataframe does not have solution column"
-    solved_data["expense"] = abs(solved_data["Debit"])
+    cube = build_solution_cube(solved_data)
+
+    figures = [
+        plot_pie_charts(cube),
+        plot_sunbirst_charts(cube),
+        *plot_bar_plots(cube),
+        plot_grocery_bar_chart(cube, grocery_threshold),
+        plot_expense_by_month_and_type(cube),
+    ]
+    return show_figures(figures, show)
+
+
+def build_solution_cube(solved_data: pd.DataFrame) -> pd.DataFrame:
+    # one pass over the transactions, every plot aggregates this further.
+    # Each cell keeps the position of its first transaction, the sunbursts
+    # list their sectors in that order as on the transactions
+    debit = amount(solved_data, "Debit")
+    frame = solved_data[["solution"] + CUBE_KEYS].assign(
+        Debit=debit,
+        Credit=amount(solved_data, "Credit"),
+        expense=debit.abs(),
+        position=np.arange(len(solved_data)),
+    )
+    by_solution = aggregate_cells(
+        frame.groupby(["solution"] + CUBE_KEYS, dropna=False, observed=True)
+    )
+    return pd.concat(
+        {
+            "original": aggregate_cells(
+                by_solution.groupby(level=CUBE_KEYS, dropna=False, observed=True)
+            ),
+            "optimized": cube_slice(by_solution, "solution", 1),
+        },
+        names=["data_type"],
+    )
+
+
+def aggregate_cells(grouped) -> pd.DataFrame:
+    return grouped[CUBE_COLUMNS].sum().assign(position=grouped["position"].min())
+
 
-    plot_pie_charts(solved_data)
-    plot_sunbirst_charts(solved_data)
-    plot_bar_plots(solved_data)
-    plot_grocery_bar_chart(solved_data, grocery_threshold)
-    plot_expense_by_month_and_type(solved_data)
+def cube_slice(cube: pd.DataFrame, level: str, value) -> pd.DataFrame:
+    return cube[cube.index.get_level_values(level) == value].droplevel(level)
 
 
-def plot_pie_charts(solved_data: pd.DataFrame):
-    agg_all = solved_data.groupby("type")[["expense"]].sum().reset_index()
+def aggregate_cube(cube: pd.DataFrame, data_type: str, keys: List[str]) -> pd.DataFrame:
+    return (
+        aggregate_cells(
+            cube_slice(cube, "data_type", data_type).groupby(
+                level=keys, dropna=False, observed=True
+            )
+        )
+        .sort_index()
+        .reset_index()
+    )
+
+
+def aggregate_cube_in_data_order(
+    cube: pd.DataFrame, data_type: str, keys: List[str]
+) -> pd.DataFrame:
+    return (
+        aggregate_cube(cube, data_type, keys)
+        .sort_values("position", kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def aggregate_cube_by_data_type(cube: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    return pd.concat(
+        [aggregate_cube(cube, t, keys).assign(data_type=t) for t in DATA_TYPES]
+    )
+
 
-    fig = make_subplots(
+def plot_pie_charts(cube: pd.DataFrame) -> go.Figure:
+    agg_all = aggregate_cube(cube, "original", ["type"])
+
+    fig = subplots.make_subplots(
         rows=1, cols=2, specs=[[{"type": "domain"}, {"type": "domain"}]]
     )
     fig.add_trace(go.Pie(labels=agg_all["type"], values=agg_all["expense"]), 1, 1)
 
-    agg_filtered = (
-        solved_data[solved_data["solution"] == 1]
-        .groupby("type")[["expense"]]
-        .sum()
-        .reset_index()
-    )
+    agg_filtered = aggregate_cube(cube, "optimized", ["type"])
 
     fig.add_trace(
         go.Pie(labels=agg_filtered["type"], values=agg_filtered["expense"]), 1, 2
@@ -45,21 +115,25 @@ def plot_pie_charts(solved_data: pd.DataFrame):
             dict(text="Optimized", x=0.84, y=0.5, font_size=20, showarrow=False),
         ],
     )
-    fig.show()
+    return fig
 
 
-def plot_sunbirst_charts(solved_data: pd.DataFrame):
-    sb1 = px.sunburst(solved_data, values="expense", path=["type", "entity"])._data
+def plot_sunbirst_charts(cube: pd.DataFrame) -> go.Figure:
+    sb1 = px.sunburst(
+        aggregate_cube_in_data_order(cube, "original", ["type", "entity"]),
+        values="expense",
+        path=["type", "entity"],
+    )._data
 
     sb2 = px.sunburst(
-        solved_data[solved_data["solution"] == 1],
+        aggregate_cube_in_data_order(cube, "optimized", ["type", "entity"]),
         values="expense",
         path=["type", "entity"],
     )._data
 
     # use data and structure FROM sb1 and sb2 (trick)
 
-    fig = make_subplots(
+    fig = subplots.make_subplots(
         rows=1, cols=2, specs=[[{"type": "domain"}, {"type": "domain"}]]
     )
 
@@ -94,34 +168,20 @@ def plot_sunbirst_charts(solved_data: pd.DataFrame):
         ],
     )
     # fig = go.Figure(data = [trace1, trace2], layout = layout)
-    fig.show()
+    return fig
 
 
-def compute_balance_data(solved_data: pd.DataFrame):
-    balance = solved_data.groupby(["month"]).sum().reset_index()
+def compute_balance_data(cube: pd.DataFrame):
+    balance = aggregate_cube_by_data_type(cube, ["month"])
     balance["balance"] = balance["Credit"] + balance["Debit"]
     balance["color"] = np.where(balance["balance"] < 0, "Negative", "Positive")
-    balance["savings"] = balance["balance"].cumsum()
-    balance["data_type"] = "original"
-
-    balance_optimized = (
-        solved_data[solved_data["solution"] == 1].groupby(["month"]).sum().reset_index()
-    )
-    balance_optimized["balance"] = (
-        balance_optimized["Credit"] + balance_optimized["Debit"]
-    )
-    balance_optimized["color"] = np.where(
-        balance_optimized["balance"] < 0, "Negative", "Positive"
-    )
-    balance_optimized["savings"] = balance_optimized["balance"].cumsum()
-    balance_optimized["data_type"] = "optimized"
-
-    balance = pd.concat([balance, balance_optimized])
+    balance["savings"] = balance.groupby("data_type", sort=False)["balance"].cumsum()
     return balance
 
 
-def plot_bar_plots(solved_data: pd.DataFrame):
-    balance = compute_balance_data(solved_data)
+def plot_bar_plots(cube: pd.DataFrame) -> List[go.Figure]:
+    balance = compute_balance_data(cube)
+    figures = []
 
     fig = px.bar(
         balance,
@@ -135,7 +195,7 @@ def plot_bar_plots(solved_data: pd.DataFrame):
         height=400,
     )
 
-    fig.show()
+    figures.append(fig)
     fig = px.bar(
         balance,
         x="month",
@@ -148,7 +208,7 @@ def plot_bar_plots(solved_data: pd.DataFrame):
         barmode="group",
         height=400,
     )
-    fig.show()
+    figures.append(fig)
 
     fig = px.area(
         balance,
@@ -160,20 +220,12 @@ def plot_bar_plots(solved_data: pd.DataFrame):
         color_discrete_sequence=["red", "green"],
         title=f"Savings trend",
     )
-    fig.show()
+    figures.append(fig)
+    return figures
 
 
-def plot_expense_by_month_and_type(solved_data: pd.DataFrame):
-    grouped_all = solved_data.groupby(["month", "type"]).sum().reset_index()
-    grouped_all["data_type"] = "original"
-    grouped_optimized = (
-        solved_data[solved_data["solution"] == 1]
-        .groupby(["month", "type"])
-        .sum()
-        .reset_index()
-    )
-    grouped_optimized["data_type"] = "optimized"
-    grouped = pd.concat([grouped_all, grouped_optimized])
+def plot_expense_by_month_and_type(cube: pd.DataFrame) -> go.Figure:
+    grouped = aggregate_cube_by_data_type(cube, ["month", "type"])
     fig = px.bar(
         grouped,
         x="month",
@@ -189,25 +241,13 @@ def plot_expense_by_month_and_type(solved_data: pd.DataFrame):
         title=f"Total Expenses by month and type",
         height=400,
     )
-    fig.show()
+    return fig
 
 
-def plot_grocery_bar_chart(solved_data: pd.DataFrame, grocery_threshold=None):
-    grocery_data_original = (
-        solved_data[solved_data["type"] == "grocery"]
-        .groupby(["week"])
-        .sum()
-        .reset_index()
-    )
-    grocery_data_original["data_type"] = "original"
-    grocery_data_optimized = (
-        solved_data[(solved_data["type"] == "grocery") & (solved_data["solution"] == 1)]
-        .groupby(["week"])
-        .sum()
-        .reset_index()
+def plot_grocery_bar_chart(cube: pd.DataFrame, grocery_threshold=None) -> go.Figure:
+    grocery_data = aggregate_cube_by_data_type(
+        cube[cube.index.get_level_values("type") == "grocery"], ["week"]
     )
-    grocery_data_optimized["data_type"] = "optimized"
-    grocery_data = pd.concat([grocery_data_original, grocery_data_optimized])
 
     fig = px.bar(
         grocery_data,
@@ -244,14 +284,14 @@ def plot_grocery_bar_chart(solved_data: pd.DataFrame, grocery_threshold=None):
         ]
         fig["layout"].update(shapes=shapes)
 
-    fig.show()
+    return fig
 
 
-def plot_solution_preview(solved_data: pd.DataFrame):
-    solved_data["expense"] = abs(solved_data["Debit"])
+def plot_solution_preview(solved_data: pd.DataFrame, show: bool = True) -> go.Figure:
+    cube = build_solution_cube(solved_data)
 
     # Initialize figure with subplots
-    fig = make_subplots(
+    fig = subplots.make_subplots(
         rows=2,
         cols=2,
         column_widths=[0.6, 0.4],
@@ -264,7 +304,7 @@ def plot_solution_preview(solved_data: pd.DataFrame):
     )
 
     sb1 = px.sunburst(
-        solved_data[solved_data["solution"] == 1],
+        aggregate_cube_in_data_order(cube, "optimized", ["type", "entity"]),
         values="expense",
         path=["type", "entity"],
     )._data
@@ -282,7 +322,7 @@ def plot_solution_preview(solved_data: pd.DataFrame):
 
     # Add locations bar chart
 
-    balance = compute_balance_data(solved_data)
+    balance = compute_balance_data(cube)
 
     balance_optimized = balance[balance["data_type"] == "optimized"]
 
@@ -307,4 +347,4 @@ def plot_solution_preview(solved_data: pd.DataFrame):
         height=600, width=900, showlegend=False, title_text="Optimized plan preview"
     )
 
-    fig.show()
+    return show_figures([fig], show)[0]